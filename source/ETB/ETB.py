@@ -320,6 +320,37 @@ class ETB(object):
         return self._vsm.ch_get_mA_all()
 
 
+    ###
+    # Get the bus voltage and current (INA) of a given output channel (1-4).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    channel         Channel to be selected (1-4)
+    # @return       Tuple of (V, mA) in case of success; otherwise False.
+    ###
+    def ch_get_VA(self, channel):
+        return self._vsm.ch_get_VA(channel)
+
+
+    ###
+    # Get the bus voltage and current (INA) of all output channels.
+    #
+    # @param[in]    self            The object pointer.
+    # @return       List of (V, mA) tuples (channel 1-4) in case of success; otherwise False.
+    ###
+    def ch_get_VA_all(self):
+        return self._vsm.ch_get_VA_all()
+
+
+    ###
+    # Get the bus voltage and current (INA) of all output channels in a single pass.
+    #
+    # @param[in]    self            The object pointer.
+    # @return       List of (V, mA) tuples (channel 1-4) in case of success; otherwise False.
+    ###
+    def snapshot(self):
+        return self._vsm.snapshot()
+
+
     ###
     # Convert a voltage in volts (V) to the corresponding decimal value (MIC).
     #
@@ -18,10 +18,10 @@
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
 # time (for sleep method)
 import time
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_get_bus
 
 
 ##### GLOBAL VARIABLES #####
@@ -117,8 +117,8 @@ class ADS1115(object):
         # Object's own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Object's own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Object's I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
 
 
     ###
@@ -128,7 +128,9 @@ class ADS1115(object):
     # @param[in]    register        Register address.
     # @return       List of bytes in case of success; otherwise False.
     def read_register_raw(self, register):
-        return self.__bus.read_i2c_block_data(self.__i2c_address, register) 
+        # Read both bytes only (the default block length is 32 bytes)
+        with self.__lock:
+            return self.__bus.read_i2c_block_data(self.__i2c_address, register, 2)
 
 
     ###
@@ -156,7 +158,8 @@ class ADS1115(object):
     # @param[in]    value           Register value to be written.
     # @return       True in case of success; otherwise False.
     def write_register(self, register, value):
-        return self.__bus.write_i2c_block_data(self.__i2c_address, register, [(value >> 8) & 0xFF, value & 0xFF])
+        with self.__lock:
+            return self.__bus.write_i2c_block_data(self.__i2c_address, register, [(value >> 8) & 0xFF, value & 0xFF])
 
 
     ###
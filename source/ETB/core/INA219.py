@@ -15,12 +15,17 @@
 # @example  ina = INA219()                 # Get an instance with default I2C address (0x40)
 # @example  volt = ina.get_bus_voltage_V() # Read the bus voltage in volts (V)
 # @example  amps = ina.get_current_mA      # Read the current in milliampere (mA)
+# @example  ina.wait_conversion()          # Wait for a new (not yet read) conversion result
+# @example  (vs, vb, i, p) = ina.sample_all() # Read all measurement registers at once
+# @example  amps = await ina.get_current_mA_async() # Read the current within an asyncio event loop
 #####
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
+# time (for the conversion timeout)
+import time
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_get_bus, I2C_run_async
 
 
 ##### GLOBAL VARIABLES #####
@@ -33,6 +38,10 @@ INA219_REG_CURRENT        = 0x04
 INA219_REG_CALIBRATION    = 0x05
 # Reset-bit mask (RST)
 INA219_RST                = 0x8000
+# Conversion-ready-bit mask (CNVR; in the bus voltage register)
+INA219_CNVR               = 0x0002
+# Longest conversion time in seconds (12-bit with 128 samples: 68.1ms)
+INA219_CONV_TIMEOUT       = 0.07
 # Bus voltage range (BRNG)
 INA219_BRNG_OFFSET        = 13
 INA219_BRNG = {
@@ -102,8 +111,8 @@ class INA219(object):
         # Object's own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Object's own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Object's I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
         # @var _current_lsb
         # Object's own current value for LSB (mA)
         self._current_lsb = 0
@@ -113,6 +122,9 @@ class INA219(object):
         # @var _cal_value
         # Object's own calibration value
         self._cal_value = 0
+        # @var __config
+        # Shadow copy of the configuration register (None if not read yet)
+        self.__config = None
 
 
     ###
@@ -176,7 +188,9 @@ class INA219(object):
     # @param[in]    register        Register address.
     # @return       List of bytes in case of success; otherwise False.
     def read_register_raw(self, register):
-        return self.__bus.read_i2c_block_data(self.__i2c_address, register) 
+        # Read both bytes only (the default block length is 32 bytes)
+        with self.__lock:
+            return self.__bus.read_i2c_block_data(self.__i2c_address, register, 2)
 
 
     ###
@@ -184,7 +198,7 @@ class INA219(object):
     #
     # @param[in]    self            The object pointer.
     # @param[in]    register        Register address.
-    # @return       16-bit register value in case of success; otherwise False.
+    # @return       16-bit register value (raises OSError on bus errors).
     def read_ina_register(self, register):
         buf = []
         buf = self.read_register_raw(register)
@@ -203,7 +217,8 @@ class INA219(object):
     # @param[in]    value           Register value to be written.
     # @return       True in case of success; otherwise False.
     def write_register(self, register, value):
-        self.__bus.write_i2c_block_data(self.__i2c_address, register, [(value & 0xFF00) >> 8, value & 0x00FF])
+        with self.__lock:
+            self.__bus.write_i2c_block_data(self.__i2c_address, register, [(value & 0xFF00) >> 8, value & 0x00FF])
 
 
     # Request a reset of the INA.
@@ -213,13 +228,65 @@ class INA219(object):
     def reset(self):
         # Set the RST bit in the configuration register
         self.write_register(INA219_REG_CONFIG, INA219_RST)
+        # The configuration is reset to its default (read again on next use)
+        self.__config = None
+
+
+    ###
+    # Get the configuration register value (read once, then from the shadow copy).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Configuration register value (raises OSError on bus errors).
+    def _get_config(self):
+        if self.__config is None:
+            self.__config = self.read_ina_register(INA219_REG_CONFIG) & 0xFFFF
+        return self.__config
+
+
+    ###
+    # Write the configuration register and update its shadow copy.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    value           Configuration register value.
+    def _set_config(self, value):
+        self.write_register(INA219_REG_CONFIG, value)
+        self.__config = value & 0xFFFF
+
+
+    ###
+    # Check if a new conversion result is available (CNVR).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       True if a conversion has completed since CNVR was cleared; otherwise False.
+    def conversion_ready(self):
+        return bool(self.read_ina_register(INA219_REG_VBUS) & INA219_CNVR)
+
+
+    ###
+    # Wait for a new conversion result and clear the CNVR flag (by reading the power register).
+    # The following register reads return this new result.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    timeout         Timeout in seconds (default: longest conversion time)
+    # @return       True in case of success; False on timeout.
+    def wait_conversion(self, timeout=INA219_CONV_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        # Poll the CNVR flag
+        while not self.conversion_ready():
+            # Check if timeout has already been reached
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(50e-6)
+        # Reading the power register clears CNVR
+        self.read_ina_register(INA219_REG_POWER)
+        return True
 
 
     ###
     # Read the bus voltage in volts (V).
     #
     # @param[in]    self            The object pointer.
-    # @return       Bus voltage in volts (V) in case of success; otherwise False.
+    # @return       Bus voltage in volts (V) (raises OSError on bus errors).
     def get_bus_voltage_V(self):
         return float(self.read_ina_register(INA219_REG_VBUS) >> 1) * 0.001
 
@@ -228,7 +295,7 @@ class INA219(object):
     # Read the shunt voltage in volts (V).
     #
     # @param[in]    self            The object pointer.
-    # @return       Shunt voltage in volts (V) in case of success; otherwise False.
+    # @return       Shunt voltage in volts (V) (raises OSError on bus errors).
     def get_shunt_voltage_V(self):
         return float(self.read_ina_register(INA219_REG_VSHUNT)) * 0.001
 
@@ -237,7 +304,7 @@ class INA219(object):
     # Read the current in milliamps (mA).
     #
     # @param[in]    self            The object pointer.
-    # @return       Calibrated current in milliamps (mA) in case of success; otherwise False.
+    # @return       Calibrated current in milliamps (mA) (raises OSError on bus errors).
     def get_current_mA(self):
         return float(self.read_ina_register(INA219_REG_CURRENT)) * self._current_lsb
 
@@ -246,7 +313,7 @@ class INA219(object):
     # Read the power register in watts (W).
     #
     # @param[in]    self            The object pointer.
-    # @return       Calibrated power in watts (W) in case of success; otherwise False.
+    # @return       Calibrated power in watts (W) (raises OSError on bus errors).
     def get_power_W(self):
         return float(self.read_ina_register(INA219_REG_POWER)) * self._power_lsb
 
@@ -255,11 +322,73 @@ class INA219(object):
     # Read the power register in milliwatts (mW).
     #
     # @param[in]    self            The object pointer.
-    # @return       Calibrated power in milliwatts (mW) in case of success; otherwise False.
+    # @return       Calibrated power in milliwatts (mW) (raises OSError on bus errors).
     def get_power_mW(self):
         return float(self.read_ina_register(INA219_REG_POWER)) * (self._power_lsb*1000)
 
 
+    ###
+    # Read all measurement registers (shunt voltage, bus voltage, current, and power).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Tuple of (shunt voltage [V], bus voltage [V], current [mA], power [W]) (raises OSError on bus errors).
+    #
+    # @note     The INA219 does not auto-increment its register pointer, so each register is a
+    #           separate 2-byte read. The power register is read last as reading it clears CNVR.
+    def sample_all(self):
+        read = self.read_ina_register
+        vshunt  = read(INA219_REG_VSHUNT)
+        vbus    = read(INA219_REG_VBUS)
+        current = read(INA219_REG_CURRENT)
+        power   = read(INA219_REG_POWER)
+        return (float(vshunt) * 0.001, float(vbus >> 1) * 0.001, float(current) * self._current_lsb, float(power) * self._power_lsb)
+
+
+    ###
+    # Read the bus voltage in volts (V) without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Bus voltage in volts (V) (raises OSError on bus errors).
+    async def get_bus_voltage_V_async(self):
+        return await I2C_run_async(self.get_bus_voltage_V)
+
+
+    ###
+    # Read the shunt voltage in volts (V) without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Shunt voltage in volts (V) (raises OSError on bus errors).
+    async def get_shunt_voltage_V_async(self):
+        return await I2C_run_async(self.get_shunt_voltage_V)
+
+
+    ###
+    # Read the current in milliamps (mA) without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Calibrated current in milliamps (mA) (raises OSError on bus errors).
+    async def get_current_mA_async(self):
+        return await I2C_run_async(self.get_current_mA)
+
+
+    ###
+    # Read the power in watts (W) without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Calibrated power in watts (W) (raises OSError on bus errors).
+    async def get_power_W_async(self):
+        return await I2C_run_async(self.get_power_W)
+
+
+    ###
+    # Read all measurement registers without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Tuple of (shunt voltage [V], bus voltage [V], current [mA], power [W]) (raises OSError on bus errors).
+    async def sample_all_async(self):
+        return await I2C_run_async(self.sample_all)
+
+
     ###
     # Set the calibration register.
     #
@@ -280,12 +409,12 @@ class INA219(object):
         # Check the given value
         if brng not in INA219_BRNG:
             raise ValueError('Valid BRNG values are:  16 and 32')
-        # Read config register value
-        reg = self.read_ina_register(INA219_REG_CONFIG)
+        # Get config register value (shadow copy)
+        reg = self._get_config()
         # Prepare new register value
         conf = (reg & 0xDFFF) | (INA219_BRNG[brng]<<INA219_BRNG_OFFSET)
         # Write new register value
-        self.write_register(INA219_REG_CONFIG, conf)
+        self._set_config(conf)
 
 
     ###
@@ -298,12 +427,12 @@ class INA219(object):
         # Check the given value
         if pg not in INA219_PG:
             raise ValueError('Valid PG values are:  40, 80, 160, and 320 [mV]')
-        # Read config register value
-        reg = self.read_ina_register(INA219_REG_CONFIG)
+        # Get config register value (shadow copy)
+        reg = self._get_config()
         # Prepare new register value
         conf = (reg & 0xE7FF) | (INA219_PG[pg]<<INA219_PG_OFFSET)
         # Write new register value
-        self.write_register(INA219_REG_CONFIG, conf)
+        self._set_config(conf)
 
     
     ###
@@ -322,15 +451,15 @@ class INA219(object):
         # Get new ADC configuration
         value = 0
         if(bits < 12):
-            value = INA219_ADC_BIT[bits]
+            value = INA219_ADC_BITS[bits]
         else:
-            value = 0x80 | INA219_ADC_SAMPLE[sample]
-        # Read config register value
-        reg = self.read_ina_register(INA219_REG_CONFIG)
+            value = 0x08 | INA219_ADC_SAMPLE[sample]
+        # Get config register value (shadow copy)
+        reg = self._get_config()
         # Prepare new register value
         conf = (reg & 0xF87F) | (value<<INA219_BADC_OFFSET)
         # Write new register value
-        self.write_register(INA219_REG_CONFIG, conf)
+        self._set_config(conf)
 
 
     ###
@@ -349,15 +478,15 @@ class INA219(object):
         # Get new ADC configuration
         value = 0
         if(bits < 12):
-            value = INA219_ADC_BIT[bits]
+            value = INA219_ADC_BITS[bits]
         else:
-            value = 0x80 | INA219_ADC_SAMPLE[sample]
-        # Read config register value
-        reg = self.read_ina_register(INA219_REG_CONFIG)
+            value = 0x08 | INA219_ADC_SAMPLE[sample]
+        # Get config register value (shadow copy)
+        reg = self._get_config()
         # Prepare new register value
         conf = (reg & 0xF87F) | (value<<INA219_SADC_OFFSET)
         # Write new register value
-        self.write_register(INA219_REG_CONFIG, conf)
+        self._set_config(conf)
 
     
     ###
@@ -370,9 +499,9 @@ class INA219(object):
         # Check the given value
         if (mode<INA219_MODE_PDOWN) or (mode>INA219_MODE_SB_CONT):
             raise ValueError('Invalid mode value!')
-        # Read config register value
-        reg = self.read_ina_register(INA219_REG_CONFIG)
+        # Get config register value (shadow copy)
+        reg = self._get_config()
         # Prepare new register value
         conf = (reg & 0xFFF8) | mode
         # Write new register value
-        self.write_register(INA219_REG_CONFIG, conf)
+        self._set_config(conf)
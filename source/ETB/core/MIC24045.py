@@ -15,18 +15,21 @@
 # @example  value = mic.get_register_from_voltage(3.3) # Get the register value corresponding to an voltage of 3.3V
 # @example  mic.set_output_voltage(value) # Set the output voltage to the previously calculated decimal value
 # @example  vout = mic.get_voltage_V()    # Get the current voltage in Volts (V)
+# @example  vout = await mic.get_voltage_V_async() # ... within an asyncio event loop
 #####
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
 # GPIO functionality (imported as GPIO)
 import RPi.GPIO as GPIO
 # for GPIO numbering, choose BCM mode
 GPIO.setmode(GPIO.BCM)
 # Disable GPIO in-use warnings
 GPIO.setwarnings(False)
+# bisect (for the voltage table search)
+from bisect import bisect_right
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_get_bus, I2C_run_async
 
 
 ##### GLOBAL VARIABLES #####
@@ -85,6 +88,34 @@ MIC24045_SS = {
 }
 
 
+###
+# Calculate the output voltage in volts (V) of a VOUT register value.
+#
+# @param[in]    reg             VOUT register value (0..255).
+# @return       Corresponding voltage in volts (V).
+def _vout_calc(reg):
+    if reg<129:
+        # 5mV step sizes
+        vout = (reg * 0.005) + 0.640
+    elif reg<196:
+        # 10mV step sizes
+        vout = ((reg-129) * 0.01) + 1.29
+    elif reg<245:
+        # 30mV step sizes
+        vout = ((reg-196) * 0.03) + 1.98
+    else:
+        # 50mV step sizes
+        vout = ((reg-245) * 0.05) + 4.75
+    # Round to full millivolts (removes floating-point residue)
+    return round(vout, 3)
+
+
+# Output voltage [V] by VOUT register value (ascending)
+MIC24045_VOUT_TABLE = tuple(_vout_calc(reg) for reg in range(256))
+# Tolerance [V] for voltage lookups (e.g., 3.3 vs. 3.2999999)
+MIC24045_VOUT_TOL = 1e-9
+
+
 #####
 # @class    MIC24045
 # @brief    MIC24045 DC/DC converter class
@@ -103,11 +134,14 @@ class MIC24045(object):
         # Object's own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Object's own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Object's I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
         # @var __gpio
         # Object's own enable GPIO pin (BCM)
         self.__gpio = gpio
+        # @var __shadow
+        # Shadow copies of the setting registers (by register address)
+        self.__shadow = {}
 
         # Set enable pin to output
         GPIO.setup(self.__gpio, GPIO.OUT)
@@ -116,16 +150,10 @@ class MIC24045(object):
         
         # Clear the fault flag
         self.clear_fault_flag()
-        # Set the current limit to 3A (because of the INA219 limits)
-        self.set_current_limit(3)
-        # Set the operating frequency to 500kHz
-        self.set_frequency(500)
-        # Set the start-up delay to 0ms
-        self.set_startup_delay(0)
-        # Set the voltage margin to 0%
-        self.set_voltage_margins(0)
-        # Set the soft-start slope to its lowest value (0.16 V/ms)
-        self.set_soft_start_slope(0.16)
+        # Set the current limit to 3A (because of the INA219 limits), the operating frequency
+        # to 500kHz, the start-up delay to 0ms, the voltage margin to 0%, and the soft-start
+        # slope to its lowest value (0.16 V/ms)
+        self._init_registers(3, 500, 0, 0, 0.16)
 
 
     ###
@@ -155,11 +183,9 @@ class MIC24045(object):
     def read_register(self, register):
         # Try to read the given register
         try:
-            # Write the register address value
-            self.__bus.write_byte(self.__i2c_address, register)
-            # Read a byte from this address
-            ret = self.__bus.read_byte(self.__i2c_address)
-            return ret
+            # Write the register address and read the byte (single transaction with repeated start)
+            with self.__lock:
+                return self.__bus.read_byte_data(self.__i2c_address, register)
         except:
             return False
 
@@ -174,12 +200,78 @@ class MIC24045(object):
         # Try to write the given register
         try:
             # Write the byte to the register address
-            self.__bus.write_byte_data(self.__i2c_address, register, value)
+            with self.__lock:
+                self.__bus.write_byte_data(self.__i2c_address, register, value)
             return True
         except:
             return False
 
 
+    ###
+    # Read a setting register (read once, then from the shadow copy).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    register        Register address.
+    # @return       8-bit register value in case of success; otherwise False.
+    def _read_register_shadowed(self, register):
+        ret = self.__shadow.get(register)
+        if ret is None:
+            ret = self.read_register(register)
+            if ret is not False:
+                self.__shadow[register] = ret
+        return ret
+
+
+    ###
+    # Write a setting register and update its shadow copy.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    register        Register address.
+    # @param[in]    value           Register value to be written.
+    # @return       True in case of success; otherwise False.
+    def _write_register_shadowed(self, register, value):
+        ret = self.write_register(register, value)
+        if ret is False:
+            # Register state is unknown now
+            self.__shadow.pop(register, None)
+        else:
+            self.__shadow[register] = value & 0xFF
+        return ret
+
+
+    ###
+    # Initialize the SETTING 1 and SETTING 2 registers from the given settings.
+    # Both register values are composed from the settings and written with one write each
+    # (no read-modify-write); the shadow copies are updated accordingly.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    ilim            Current limit in amps (A; 2, 3, 4, or 5).
+    # @param[in]    freq            Switching frequency in kHz (310, 400, 500, 570, 660, 780, 970, or 1200).
+    # @param[in]    delay           Start-up delay in ms (0, 0.5, 1, 2, 4, 6, 8, or 10).
+    # @param[in]    margin          Voltage margin in percent (0, -5, or +5).
+    # @param[in]    slope           Soft-start slope in V/ms (0.16, 0.38, 0.76, or 1.5).
+    # @return       True in case of success; otherwise False.
+    def _init_registers(self, ilim, freq, delay, margin, slope):
+        # Check given parameters
+        if ilim not in MIC24045_ILIM:
+            raise ValueError('Valid ILIM values are: 2, 3, 4, and 5')
+        if freq not in MIC24045_FREQ:
+            raise ValueError('Valid FREQ values are: 310, 400, 500, 570, 660, 780, 970, 1200 [kHz]')
+        if delay not in MIC24045_SUD:
+            raise ValueError('Valid SD values are: 0, 0.5, 1, 2, 4, 6, 8, 10 [ms]')
+        if margin not in MIC24045_MRG:
+            raise ValueError('Valid MRG values are: 0, -5, +5 [%]')
+        if slope not in MIC24045_SS:
+            raise ValueError('Valid SS values are: 0.16, 0.38, 0.76, 1.5 [V/ms]')
+        # Prepare the register values (reserved bits are 0)
+        set1 = (MIC24045_ILIM[ilim]<<MIC24045_ILIM_OFFSET) | (MIC24045_FREQ[freq]<<MIC24045_FREQ_OFFSET)
+        set2 = (MIC24045_SUD[delay]<<MIC24045_SUD_OFFSET) | (MIC24045_MRG[margin]<<MIC24045_MRG_OFFSET) | MIC24045_SS[slope]
+        # Write the SETTING 1 and SETTING 2 registers
+        if self._write_register_shadowed(MIC24045_REG_SET1, set1) is False:
+            return False
+        return self._write_register_shadowed(MIC24045_REG_SET2, set2)
+
+
     ###
     # Read the status register value from the MIC.
     #
@@ -324,15 +416,15 @@ class MIC24045(object):
         # Check given parameter
         if ilim not in MIC24045_ILIM:
             raise ValueError('Valid ILIM values are: 2, 3, 4, and 5')
-        # Read current SETTING 1 register value
-        ret = self.read_register(MIC24045_REG_SET1)
+        # Get current SETTING 1 register value (shadow copy)
+        ret = self._read_register_shadowed(MIC24045_REG_SET1)
         # Check return status
         if ret is False:
             return False
         # Prepare the correct register value
         msg = (ret & 0x3F) | (MIC24045_ILIM[ilim]<<MIC24045_ILIM_OFFSET)
         # Write ILIM value to SETTING 1 register
-        return self.write_register(MIC24045_REG_SET1, msg)
+        return self._write_register_shadowed(MIC24045_REG_SET1, msg)
 
 
     ###
@@ -345,15 +437,15 @@ class MIC24045(object):
         # Check given parameter
         if freq not in MIC24045_FREQ:
             raise ValueError('Valid FREQ values are: 310, 400, 500, 570, 660, 780, 970, 1200 [kHz]')
-        # Read current SETTING 1 register value
-        ret = self.read_register(MIC24045_REG_SET1)
+        # Get current SETTING 1 register value (shadow copy)
+        ret = self._read_register_shadowed(MIC24045_REG_SET1)
         # Check return status
         if ret is False:
             return False
         # Prepare the correct register value
         msg = (ret & 0xC7) | (MIC24045_FREQ[freq]<<MIC24045_FREQ_OFFSET)
         # Write FREQ value to SETTING 1 register
-        return self.write_register(MIC24045_REG_SET1, msg)
+        return self._write_register_shadowed(MIC24045_REG_SET1, msg)
 
 
     ###
@@ -366,15 +458,15 @@ class MIC24045(object):
         # Check given parameter
         if delay not in MIC24045_SUD:
             raise ValueError('Valid SD values are: 0, 0.5, 1, 2, 4, 6, 8, 10 [ms]')
-        # Read current SETTING 2 register value
-        ret = self.read_register(MIC24045_REG_SET2)
+        # Get current SETTING 2 register value (shadow copy)
+        ret = self._read_register_shadowed(MIC24045_REG_SET2)
         # Check return status
         if ret is False:
             return False
         # Prepare the correct register value
         msg = (ret & 0x8F) | (MIC24045_SUD[delay]<<MIC24045_SUD_OFFSET)
         # Write SUD value to SETTING 2 register
-        return self.write_register(MIC24045_REG_SET2, msg)
+        return self._write_register_shadowed(MIC24045_REG_SET2, msg)
 
 
     ###
@@ -387,15 +479,15 @@ class MIC24045(object):
         # Check given parameter
         if margin not in MIC24045_MRG:
             raise ValueError('Valid MRG values are: 0, -5, +5 [%]')
-        # Read current SETTING 2 register value
-        ret = self.read_register(MIC24045_REG_SET2)
+        # Get current SETTING 2 register value (shadow copy)
+        ret = self._read_register_shadowed(MIC24045_REG_SET2)
         # Check return status
         if ret is False:
             return False
         # Prepare the correct register value
         msg = (ret & 0xF3) | (MIC24045_MRG[margin]<<MIC24045_MRG_OFFSET)
         # Write MRG value to SETTING 2 register
-        return self.write_register(MIC24045_REG_SET2, msg)
+        return self._write_register_shadowed(MIC24045_REG_SET2, msg)
 
 
     ###
@@ -408,15 +500,15 @@ class MIC24045(object):
         # Check given parameter
         if slope not in MIC24045_SS:
             raise ValueError('Valid SS values are: 0.16, 0.38, 0.76, 1.5 [V/ms]')
-        # Read current SETTING 2 register value
-        ret = self.read_register(MIC24045_REG_SET2)
+        # Get current SETTING 2 register value (shadow copy)
+        ret = self._read_register_shadowed(MIC24045_REG_SET2)
         # Check return status
         if ret is False:
             return False
         # Prepare the correct register value
         msg = (ret & 0xFC) | MIC24045_SS[slope]
         # Write SS value to SETTING 2 register
-        return self.write_register(MIC24045_REG_SET2, msg)
+        return self._write_register_shadowed(MIC24045_REG_SET2, msg)
 
 
     ###
@@ -484,22 +576,8 @@ class MIC24045(object):
         # Check return status
         if ret is False:
             return False
-        # Calculate the corresponding output voltage
-        vout = 0
-        if reg<129:
-            # 5mV step sizes
-            vout = (reg * 0.005) + 0.640
-        elif reg<196:
-            # 10mV step sizes
-            vout = ((reg-129) * 0.01) + 1.29
-        elif reg<245:
-            # 30mV step sizes
-            vout = ((reg-196) * 0.03) + 1.98
-        else:
-            # 50mV step sizes
-            vout = ((reg-245) * 0.05) + 4.75
-        # Return the value
-        return vout
+        # Look up the corresponding output voltage
+        return MIC24045_VOUT_TABLE[ret]
 
 
     ###
@@ -518,6 +596,34 @@ class MIC24045(object):
             return (vout*1000)
 
 
+    ###
+    # Set the output voltage VOUT without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    value           VOUT value.
+    # @return       True in case of success; otherwise False.
+    async def set_output_voltage_async(self, value):
+        return await I2C_run_async(self.set_output_voltage, value)
+
+
+    ###
+    # Get the output voltage in volts (V) without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       VOUT voltage in volts (V) in case of success; otherwise False.
+    async def get_voltage_V_async(self):
+        return await I2C_run_async(self.get_voltage_V)
+
+
+    ###
+    # Check the power-good flag without blocking the event loop (coroutine).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       True if PGS is set; otherwise False.
+    async def is_power_good_async(self):
+        return await I2C_run_async(self.is_power_good)
+
+
     ###
     # Convert a decimal register value to an actual voltage in volts (V).
     #
@@ -527,22 +633,8 @@ class MIC24045(object):
         # Check given register value
         if (reg<0) or (reg>0xFF):
             return False
-        # Calculate the output voltage in volts (V)
-        vout = 0
-        if reg<129:
-            # 5mV step sizes
-            vout = (reg * 0.005) + 0.640
-        elif reg<196:
-            # 10mV step sizes
-            vout = ((reg-129) * 0.01) + 1.29
-        elif reg<245:
-            # 30mV step sizes
-            vout = ((reg-196) * 0.03) + 1.98
-        else:
-            # 50mV step sizes
-            vout = ((reg-245) * 0.05) + 4.75
-        # Return the value
-        return vout
+        # Look up the output voltage in volts (V)
+        return MIC24045_VOUT_TABLE[int(reg)]
 
 
     ###
@@ -551,33 +643,8 @@ class MIC24045(object):
     # @param[in]    self            The object pointer.
     # @return       Corresponding decimal register value; otherwise False.
     def get_register_from_voltage(self,vout):
-        reg = 0
-        if vout<0.64:
-            # Invalid
-            return False
-        if vout<1.28:
-            # 5mV step sizes
-            reg = int((vout-0.64) / 0.005)
-        elif vout<1.29:
-            # Margin between 5mV and 10mV
-            reg = 128
-        elif vout<1.95:
-            # 10mV step sizes
-            reg = int((vout-1.29) / 0.01)+129
-        elif vout<1.98:
-            # Margin between 10mV and 30mV
-            reg = 195
-        elif vout<3.42:
-            # 30mV step sizes
-            reg = int((vout-1.98) / 0.03)+196
-        elif vout<4.75:
-            # Margin between 30mV and 50mV
-            reg = 244
-        elif vout<=5.25:
-            # 50mV step sizes
-            reg = int((vout-4.75) / 0.05)+245
-        else:
-            # Invalid
+        # Check given voltage
+        if (vout<MIC24045_VOUT_TABLE[0]-MIC24045_VOUT_TOL) or (vout>MIC24045_VOUT_TABLE[-1]+MIC24045_VOUT_TOL):
             return False
-        # Return the value
-        return reg
+        # Get the highest register value not exceeding the given voltage (tolerating float errors)
+        return bisect_right(MIC24045_VOUT_TABLE, vout+MIC24045_VOUT_TOL) - 1
@@ -0,0 +1,199 @@
+#####
+# @brief   Background sensor poller
+#
+# Module containing the sensor poller class that periodically reads sensors
+# in a background thread and keeps the latest value of each sensor.
+#
+# @file     /etb/core/SensorPoller.py
+# @author   $Author: Dominik Widhalm $
+# @version  $Revision: 1.0 $
+# @date     $Date: 2021/05/03 $
+#
+# @example  poller = SensorPoller()              # Get a poller instance
+# @example  poller.add(bme, 1.0)                 # Read the sensor every second
+# @example  poller.add(lm75, 0.5, lm75.read_temperature)  # Use a specific read function
+# @example  poller.start()                       # Start the background thread
+# @example  temp = poller.latest(lm75)           # Get the latest value (no bus access)
+# @example  temp = poller.latest(lm75, 2.0)      # ... only if not older than 2 seconds
+# @example  err = poller.last_error(lm75)        # Get the exception of the last failed reading
+# @example  poller.stop()                        # Stop the background thread
+#####
+
+
+##### LIBRARIES #####
+# time (for the monotonic clock)
+import time
+# threading (for the background thread)
+import threading
+
+
+#####
+# @class    SensorPoller
+# @brief    Background sensor poller
+#
+# Class reading sensors periodically in a background thread. Readers get the
+# latest value of a sensor without accessing the bus.
+class SensorPoller(object):
+    ###
+    # The constructor.
+    #
+    # @param[in]    self            The object pointer.
+    def __init__(self):
+        # @var __lock
+        # Lock protecting the sensor list and the latest values
+        self.__lock = threading.Lock()
+        # @var __sensors
+        # Polled sensors as list of [sensor, read function, interval, next due time]
+        self.__sensors = []
+        # @var __latest
+        # Latest value and its time (monotonic) by sensor
+        self.__latest = {}
+        # @var __thread
+        # Background thread (None if not running)
+        self.__thread = None
+        # @var __errors
+        # Exception of the last failed reading by sensor (cleared on success)
+        self.__errors = {}
+        # @var __stop
+        # Event to stop the background thread
+        self.__stop = threading.Event()
+        # @var __wake
+        # Event to wake the background thread (sensor added or stop requested)
+        self.__wake = threading.Event()
+
+
+    ###
+    # Add a sensor to be polled.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    sensor          Sensor object.
+    # @param[in]    interval        Polling interval in seconds.
+    # @param[in]    func            Read function (default: sensor's read_temperature_humidity or read_temperature).
+    def add(self, sensor, interval, func=None):
+        # Check the given interval
+        if interval <= 0:
+            raise ValueError('Polling interval has to be positive')
+        # Get the default read function
+        if func is None:
+            func = getattr(sensor, 'read_temperature_humidity', None)
+            if func is None:
+                func = sensor.read_temperature
+        with self.__lock:
+            self.__sensors.append([sensor, func, interval, time.monotonic()])
+        # Wake the background thread (the new sensor is due now)
+        self.__wake.set()
+
+
+    ###
+    # Remove a sensor (its latest value is discarded).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    sensor          Sensor object.
+    def remove(self, sensor):
+        with self.__lock:
+            self.__sensors = [entry for entry in self.__sensors if entry[0] is not sensor]
+            self.__latest.pop(sensor, None)
+            self.__errors.pop(sensor, None)
+
+
+    ###
+    # Start the background thread.
+    #
+    # @param[in]    self            The object pointer.
+    # @return       True in case of success; False if the poller is already running.
+    def start(self):
+        # Check if the poller is already running
+        if self.__thread is not None:
+            return False
+        self.__stop.clear()
+        self.__wake.clear()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+        return True
+
+
+    ###
+    # Stop the background thread (the latest values are kept).
+    #
+    # @param[in]    self            The object pointer.
+    def stop(self):
+        # Check if the poller is running
+        if self.__thread is None:
+            return
+        # Stop the thread and wait for it to finish
+        self.__stop.set()
+        self.__wake.set()
+        self.__thread.join()
+        self.__thread = None
+
+
+    ###
+    # Get the latest value of a sensor.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    sensor          Sensor object.
+    # @param[in]    max_age         Maximum age of the value in seconds (default: None, i.e., any age).
+    # @return       Latest value in case of success; otherwise False (no value yet or too old).
+    def latest(self, sensor, max_age=None):
+        entry = self.__latest.get(sensor)
+        if entry is None:
+            return False
+        (value, timestamp) = entry
+        # Check the age of the value (e.g., if the poller has stalled)
+        if (max_age is not None) and ((time.monotonic() - timestamp) > max_age):
+            return False
+        return value
+
+
+    ###
+    # Get the exception of the last failed reading of a sensor.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    sensor          Sensor object.
+    # @return       Exception of the last reading if it failed; otherwise None.
+    def last_error(self, sensor):
+        return self.__errors.get(sensor)
+
+
+    ###
+    # Background thread function.
+    #
+    # @param[in]    self            The object pointer.
+    def __run(self):
+        stop = self.__stop
+        wake = self.__wake
+        monotonic = time.monotonic
+        while not stop.is_set():
+            now = monotonic()
+            # Get the sensors that are due
+            with self.__lock:
+                due = [entry for entry in self.__sensors if entry[3] <= now]
+            for entry in due:
+                (sensor, func, interval, _) = entry
+                # Any exception of a sensor must not end the thread
+                try:
+                    value = func()
+                    error = None
+                except Exception as e:
+                    value = False
+                    error = e
+                with self.__lock:
+                    # Skip sensors removed in the meantime
+                    if not any(item is entry for item in self.__sensors):
+                        continue
+                    # Store successful readings only (failed sensors age out)
+                    if value is not False:
+                        self.__latest[sensor] = (value, monotonic())
+                    if error is None:
+                        self.__errors.pop(sensor, None)
+                    else:
+                        self.__errors[sensor] = error
+                # Schedule the next reading (skip missed instants)
+                entry[3] = max(entry[3] + interval, now)
+            # Wait until the next sensor is due (or a sensor is added)
+            with self.__lock:
+                next_due = min([entry[3] for entry in self.__sensors], default=now + 0.1)
+            timeout = next_due - monotonic()
+            if timeout > 0:
+                wake.wait(timeout)
+            wake.clear()
@@ -13,13 +13,16 @@
 #
 # @example  multiplexer = TCA9548A()      # Get an instance with default I2C address (0x70)
 # @example  multiplexer.select(1)         # Select channel 1 (SD0/SC0)
+# @example  multiplexer.select_mask(0x0F) # Select channels 1-4 at once (e.g., for broadcast writes)
 # @example  multiplexer.get_channels()    # Get a list of currently active channels
+# @example  multiplexer.invalidate()      # Forget the cached selection (e.g., after bus errors)
+# @example  multiplexer.reset()           # Deselect all channels (always written to the bus)
 #####
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_get_bus
 
 
 #####
@@ -39,8 +42,11 @@ class TCA9548A(object):
         # Object's own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Object's own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Object's I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
+        # @var __mask
+        # Currently written channel mask (None if unknown)
+        self.__mask = None
 
     ###
     # Activate an output channel.
@@ -48,6 +54,11 @@ class TCA9548A(object):
     # @param[in]    self            The object pointer.
     # @param[in]    channel         I2C channel to be activated (1-8); value 0 deactivates all channels;
     # @return       True in case of success; otherwise False.
+    #
+    # @note     Selecting the already selected channel does not access the bus.
+    # @note     The selection only becomes active after the STOP condition of this write,
+    #           so it cannot be merged with the following device transfer into a single
+    #           combined (repeated-start/I2C_RDWR) transaction.
     def select(self, channel):
         # Check if given channel is valid
         if (channel < 0) or (channel > 8):
@@ -56,14 +67,55 @@ class TCA9548A(object):
         byte = 0
         if (channel > 0):
             byte = 1<<(channel-1)
-        # Try to select the given channel
+        # Select the given channel
+        return self.select_mask(byte)
+
+    ###
+    # Activate an arbitrary combination of output channels.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    mask            Channel bit mask (bit 0 = channel 1, ..., bit 7 = channel 8); value 0 deactivates all channels;
+    # @return       True in case of success; otherwise False.
+    #
+    # @note     With several channels active, devices with the same address on different channels
+    #           all respond at once. This is only safe for writes (e.g., broadcasting a register value),
+    #           not for reads.
+    def select_mask(self, mask):
+        # Check if given mask is valid
+        if (mask < 0) or (mask > 0xFF):
+            return False
+        # Check if the mask is already written
+        if mask == self.__mask:
+            return True
+        # Try to write the given mask
         try:
-            self.__bus.write_byte(self.__i2c_address, byte)
+            with self.__lock:
+                self.__bus.write_byte(self.__i2c_address, mask)
         except:
+            # State of the mux is unknown now
+            self.__mask = None
             return False
         else:
+            self.__mask = mask
             return True
 
+    ###
+    # Deselect all channels, regardless of the cached selection (e.g., to recover from bus errors).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       True in case of success; otherwise False.
+    def reset(self):
+        self.invalidate()
+        return self.select_mask(0)
+
+    ###
+    # Invalidate the cached channel selection (e.g., after bus errors or a reset).
+    # The next call of select() will write to the mux in any case.
+    #
+    # @param[in]    self            The object pointer.
+    def invalidate(self):
+        self.__mask = None
+
     ###
     # Read the current settings (8-bit).
     #
@@ -72,7 +124,8 @@ class TCA9548A(object):
     def read(self):
         raw = 0
         try:
-            raw = self.__bus.read_byte(self.__i2c_address)
+            with self.__lock:
+                raw = self.__bus.read_byte(self.__i2c_address)
         except:
             return False
         else:
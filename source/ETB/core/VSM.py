@@ -13,17 +13,32 @@
 # @example  vsm.ch_enable(1)                # Enable channel 1
 # @example  volt = vsm.ch_get_V(1)          # Read the voltage of channel 1 in volts (V)
 # @example  curr = vsm.ch_get_mA(1)         # Read the current of channel 1 in milliamps (mA)
+# @example  vals = vsm.snapshot()           # Read (V, mA) of all channels in one pass
+# @example  vsm.invalidate()                # Drop cached readings (e.g., after bus errors)
+# @example  vsm.ch_get_V(1, release=False)  # Read channel 1 and keep it selected ...
+# @example  vsm.ch_get_V(2)                 # ... as the next read switches the channel anyway
 # @example  vsm.ch_disable(1)               # Disable channel 1
+# @example  for c in vsm.ch: c.get_V()      # Iterate over all channels (ch[0] is channel 1)
+# @example  vsm.start_sampler(10)           # Sample all channels every 10ms in the background
+# @example  data = vsm.get_samples()        # Get the buffered (timestamp, values) samples
+# @example  vsm.stop_sampler()              # Stop the background sampler
 #####
 
 
 ##### LIBRARIES #####
 # time (for sleep method)
 import time
+# threading (for the bus lock)
+import threading
+# contextmanager (for the mux context)
+from contextlib import contextmanager
+# GPIO functionality (imported as GPIO)
+import RPi.GPIO as GPIO
 # Import required (local) modules
 from ETB.core.INA219 import *
 from ETB.core.MIC24045 import *
 from ETB.core.TCA9548A import *
+from ETB.util.I2C_helper import I2C_check_clock
 
 
 ##### GLOBAL VARIABLES #####
@@ -32,6 +47,102 @@ VSM_GPIO_EN1 = 5
 VSM_GPIO_EN2 = 6
 VSM_GPIO_EN3 = 19
 VSM_GPIO_EN4 = 26
+# Recommended I2C bus clock in Hz (all VSM devices support fast mode)
+VSM_I2C_CLOCK = 400000
+# Mux mask selecting all four channels (1-4)
+VSM_MUX_ALL = 0x0F
+# Read cache expiry in seconds (INA in 12-bit shunt+bus continuous mode: ~1.06ms per cycle)
+VSM_CACHE_TTL = 0.001
+# Busy-wait only for the last part of a streaming period (sleep jitter margin) in nanoseconds
+VSM_STREAM_SPIN_NS = 100000
+
+
+#####
+# @class    _Channel
+# @brief    Single VSM output channel
+#
+# Lightweight proxy binding a VSM instance to one of its output channels (1-4).
+class _Channel(object):
+    __slots__ = ('_vsm', 'channel')
+
+    ###
+    # The constructor.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    vsm             VSM object the channel belongs to
+    # @param[in]    channel         Channel number (1-4)
+    def __init__(self, vsm, channel):
+        # @var _vsm
+        # VSM object the channel belongs to
+        self._vsm = vsm
+        # @var channel
+        # Channel number (1-4)
+        self.channel = channel
+
+    ###
+    # Select the channel for a series of operations (see VSM.mux).
+    def mux(self):
+        return self._vsm.mux(self.channel)
+
+    ###
+    # Check if the channel (MIC) is enabled.
+    def is_enabled(self):
+        return self._vsm._is_enabled(self.channel)
+
+    ###
+    # Enable the channel.
+    def enable(self):
+        return self._vsm._set_enable(self.channel,1)
+
+    ###
+    # Disable the channel.
+    def disable(self):
+        return self._vsm._set_enable(self.channel,0)
+
+    ###
+    # Set the current limit of the channel (default: 2A).
+    def limit_A(self, ilim=2):
+        return self._vsm._limit_A(self.channel, ilim)
+
+    ###
+    # Calibrate the INA of the channel (default: 400mA).
+    def calibrate_A(self, imax=INA219_CAL_400MA):
+        return self._vsm._calibrate_A(self.channel, imax)
+
+    ###
+    # Set the Vout value (decimal) of the channel.
+    def set_V_decimal(self, value):
+        return self._vsm._set_vout(self.channel, value)
+
+    ###
+    # Set the output voltage (V) of the channel.
+    def set_V(self, volt):
+        return self._vsm._set_V(self.channel, volt)
+
+    ###
+    # Check if power-is-good (MIC) of the channel.
+    def is_power_good(self):
+        return self._vsm._is_power_good(self.channel)
+
+    ###
+    # Wait for power-is-good (MIC) of the channel with timeout [ms].
+    def wait_power_good(self, timeout=1000):
+        return self._vsm._wait_power_good(self.channel, timeout)
+
+    ###
+    # Get the bus voltage (INA) of the channel in volts (V).
+    def get_V(self):
+        return self._vsm._get_V(self.channel)
+
+    ###
+    # Get the current (INA) of the channel in milliamps (mA).
+    def get_mA(self):
+        return self._vsm._get_mA(self.channel)
+
+    ###
+    # Get the bus voltage and current (INA) of the channel as (V, mA).
+    def get_VA(self):
+        return self._vsm._get_VA(self.channel)
 
 
 #####
@@ -40,39 +151,178 @@ VSM_GPIO_EN4 = 26
 #
 # Class for the VSM voltage scaling module used on the ETB.
 class VSM(object):
+    __slots__ = ('_lock', '_cache', '_cache_ttl', '_mux', '_en_pins', '_mic', '_ina',
+                 '_mux_select', '_ina_get_V', '_ina_get_mA', '_sampler',
+                 '_sampler_stop', '_samples', '_samples_head', '_ina_cal', 'ch')
+
     ###
     # The constructor.
     #
     # @param[in]    self            The object pointer.
     # @param[in]    enX             GPIO pin for the enable signal of module X (in BCM numbering)
-    def __init__(self, en1=VSM_GPIO_EN1, en2=VSM_GPIO_EN2, en3=VSM_GPIO_EN3, en4=VSM_GPIO_EN4):
+    # @param[in]    cache_ttl       Expiry of cached readings in seconds (default: 1ms; 0 disables the cache)
+    def __init__(self, en1=VSM_GPIO_EN1, en2=VSM_GPIO_EN2, en3=VSM_GPIO_EN3, en4=VSM_GPIO_EN4, cache_ttl=VSM_CACHE_TTL):
+        # @var _lock
+        # Lock guarding the mux and the channel devices (re-entrant)
+        self._lock = threading.RLock()
+        # @var _cache
+        # Cached readings {(channel, quantity): (timestamp, value)}
+        self._cache = {}
+        # @var _cache_ttl
+        # Expiry of cached readings in seconds
+        self._cache_ttl = cache_ttl
+        # Check the bus clock (every VSM access is bound by the wire time)
+        I2C_check_clock(VSM_I2C_CLOCK, 1)
         # @var _mux
         # Multiplexer object
         self._mux = TCA9548A()
+        # @var _en_pins
+        # Enable GPIO pins of all channels (for bulk en/disabling)
+        self._en_pins = [en1, en2, en3, en4]
         # @var _mic[]
-        # MIC objects (1-4)
-        self._mic = [None]*5
-        self._mic[1] = MIC24045(gpio=en1)
-        self._mic[2] = MIC24045(gpio=en2)
-        self._mic[3] = MIC24045(gpio=en3)
-        self._mic[4] = MIC24045(gpio=en4)
+        # MIC objects (_mic[0] is channel 1, ..., _mic[3] is channel 4)
+        self._mic = (MIC24045(gpio=en1), MIC24045(gpio=en2), MIC24045(gpio=en3), MIC24045(gpio=en4))
         # @var _ina[]
-        # INA object (1-4)
-        self._ina = [None]*5
-        self._ina[1] = INA219()
-        self._ina[2] = INA219()
-        self._ina[3] = INA219()
-        self._ina[4] = INA219()
+        # INA objects (_ina[0] is channel 1, ..., _ina[3] is channel 4)
+        self._ina = (INA219(), INA219(), INA219(), INA219())
+        # @var _mux_select
+        # Bound select method of the mux (hot path)
+        self._mux_select = self._mux.select
+        # @var _ina_get_V[]
+        # Bound bus voltage read methods of the INAs (hot path)
+        self._ina_get_V = tuple(ina.get_bus_voltage_V for ina in self._ina)
+        # @var _ina_get_mA[]
+        # Bound current read methods of the INAs (hot path)
+        self._ina_get_mA = tuple(ina.get_current_mA for ina in self._ina)
+        # @var _sampler
+        # Background sampler thread (None if not running)
+        self._sampler = None
+        # @var _sampler_stop
+        # Event to stop the background sampler
+        self._sampler_stop = threading.Event()
+        # @var _samples
+        # Ring buffer of the background sampler [(timestamp, snapshot), ...]
+        self._samples = []
+        # @var _samples_head
+        # Total number of samples written to the ring buffer
+        self._samples_head = 0
+        # @var ch
+        # Channel objects (ch[0] is channel 1, ..., ch[3] is channel 4)
+        self.ch = tuple(_Channel(self, i) for i in range(1,5))
+        # @var _ina_cal[]
+        # Current calibration of the INAs (None if unknown)
+        self._ina_cal = [None]*4
         # Calibrate the INA
-        for i in range(1,5):
+        for i, ina in enumerate(self._ina, 1):
             # Select the channel
             self._mux.select(i)
             # Check if MIC is really enabled
-            self._ina[i].calibrate()
+            ina.calibrate()
+            self._ina_cal[i-1] = INA219_CAL_400MA
             # Deselect the channel
             self._mux.select(0)
 
 
+    ###
+    # Select a given channel (1-4) for a series of operations.
+    # The lock is held and the channel stays selected until the context is left.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    channel         Channel to be selected (1-4)
+    # @return       Tuple of the channel's (MIC, INA) objects.
+    #
+    # @example  with vsm.mux(1) as (mic, ina):
+    #               volt = ina.get_bus_voltage_V()
+    #               curr = ina.get_current_mA()
+    @contextmanager
+    def mux(self, channel):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
+        # Lock the mux and channel devices
+        with self._lock:
+            # Select the channel
+            if self._mux.select(channel) is False:
+                raise OSError('Selecting channel %d failed' % channel)
+            try:
+                yield (self._mic[channel-1], self._ina[channel-1])
+            finally:
+                # Deselect the channel
+                self._mux.select(0)
+
+
+    ###
+    # Deselect all channels (after reads with release=False).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       True in case of success; otherwise False.
+    def release(self):
+        # Lock the mux and channel devices
+        with self._lock:
+            return self._mux.select(0)
+
+
+    ###
+    # Get a cached reading if it has not expired yet.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    key             Cache key (channel, quantity)
+    # @return       Cached value if still valid; otherwise None.
+    def _cache_get(self, key):
+        entry = self._cache.get(key)
+        if entry is not None and (time.monotonic() - entry[0]) < self._cache_ttl:
+            return entry[1]
+        return None
+
+
+    ###
+    # Store a reading in the cache.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    key             Cache key (channel, quantity)
+    # @param[in]    value           Value to be cached
+    def _cache_put(self, key, value):
+        self._cache[key] = (time.monotonic(), value)
+
+
+    ###
+    # Invalidate cached readings (e.g., after bus errors or external changes).
+    # Invalidating all channels also forces the next mux selection to be written to the bus
+    # and the next calibration to be written to the INAs.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    channel         Channel to be invalidated (1-4; default: None for all)
+    def invalidate(self, channel=None):
+        # Lock the mux and channel devices
+        with self._lock:
+            if channel is None:
+                self._cache.clear()
+                self._mux.invalidate()
+                self._ina_cal = [None]*4
+            else:
+                for key in [k for k in self._cache if k[0] == channel]:
+                    del self._cache[key]
+
+
+    ###
+    # Check if a given channel (MIC) is enabled.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    channel         Channel to be selected (1-4)
+    # @return       True if enabled; False otherwise
+    def _is_enabled(self, channel):
+        # Lock the mux and channel devices
+        with self._lock:
+            # Select the channel
+            self._mux.select(channel)
+            # Check if MIC is enabled
+            ret = self._mic[channel-1].is_enabled()
+            # Deselect the channel
+            self._mux.select(0)
+            # Return the result
+            return ret
+
+
     ###
     # Check if a given channel (MIC) is enabled.
     #
@@ -81,15 +331,9 @@ class VSM(object):
     # @return       True if enabled; False otherwise
     def ch_is_enabled(self, channel):
         # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Select the channel
-        self._mux.select(channel)
-        # Check if MIC is enabled
-        ret = self._mic[channel].is_enabled()
-        # Deselect the channel
-        self._mux.select(0)
-        # Return the result
-        return ret
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
+        return self._is_enabled(channel)
 
 
     ###
@@ -100,17 +344,19 @@ class VSM(object):
     # @param[in]    enabled         Enable (1) or disable (0)
     # @return       True if enabled; False otherwise
     def _set_enable(self, channel, enabled):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Check if channel should be enabled or disabled
-        if enabled:
-            # Enable the MIC (GPIO)
-            self._mic[channel].enable()
-        else:
-            # Disable the MIC (GPIO)
-            self._mic[channel].disable()
-        # Check if the channel is enabled now
-        return self.ch_is_enabled(channel)
+        # Lock the mux and channel devices
+        with self._lock:
+            # Drop cached readings of the channel
+            self.invalidate(channel)
+            # Check if channel should be enabled or disabled
+            if enabled:
+                # Enable the MIC (GPIO)
+                self._mic[channel-1].enable()
+            else:
+                # Disable the MIC (GPIO)
+                self._mic[channel-1].disable()
+            # Check if the channel is enabled now
+            return self._is_enabled(channel)
 
 
     ###
@@ -120,6 +366,9 @@ class VSM(object):
     # @param[in]    channel         Channel to be selected (1-4)
     # @return       True is enabled; False otherwise
     def ch_enable(self, channel):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._set_enable(channel,1)
 
 
@@ -130,30 +379,60 @@ class VSM(object):
     # @param[in]    channel         Channel to be selected (1-4)
     # @return       True is enabled; False otherwise
     def ch_disable(self, channel):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._set_enable(channel,0)
 
 
+    ###
+    # En/Disable all channels (MIC) with a single GPIO call.
+    # The resulting states are read back in one mux walk.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    enabled         Enable (1) or disable (0)
+    # @return       True if all channels are en/disabled now; False otherwise
+    def _set_enable_all(self, enabled):
+        # Lock the mux and channel devices
+        with self._lock:
+            # Drop cached readings of all channels
+            self._cache.clear()
+            # Set all enable GPIO pins at once
+            GPIO.output(self._en_pins, GPIO.HIGH if enabled else GPIO.LOW)
+            # Check if the channels are en/disabled now
+            expected = 1 if enabled else 0
+            select = self._mux.select
+            try:
+                for i, mic in enumerate(self._mic, 1):
+                    # Select the next channel (no deselect in between)
+                    if select(i) is False:
+                        return False
+                    ret = mic.is_enabled()
+                    if (ret is False) or (ret != expected):
+                        return False
+            finally:
+                # Deselect the channel
+                select(0)
+            # Done
+            return True
+
+
+    ###
     # Enable all channels.
     #
     # @param[in]    self            The object pointer.
     # @return       True is enabled; False otherwise
     def ch_enable_all(self):
-        for i in range(1,5):
-            if self.ch_enable(i) is False:
-                return False
-        return True
+        return self._set_enable_all(1)
 
 
     ###
     # Disable all channels.
     #
     # @param[in]    self            The object pointer.
-    # @return       True is enabled; False otherwise
+    # @return       True is disabled; False otherwise
     def ch_disable_all(self):
-        for i in range(1,5):
-            if self.ch_disable(i) is False:
-                return False
-        return True
+        return self._set_enable_all(0)
 
 
     ###
@@ -164,19 +443,21 @@ class VSM(object):
     # @param[in]    ilim            Current limit for the MIC (default: 2A)
     # @return       True in case of success; False otherwise
     def _limit_A(self, channel, ilim=2):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Select the channel
-        if rself._mux.select(channel) is False:
-            return False
-        # Set the MIC current limit
-        if self._mic[channel].set_current_limit(ilim) is False:
-            return False
-        # Deselect the channel
-        if self._mux.select(0) is False:
-            return False
-        # Done
-        return True
+        # Lock the mux and channel devices
+        with self._lock:
+            # Drop cached readings of the channel
+            self.invalidate(channel)
+            # Select the channel
+            if self._mux.select(channel) is False:
+                return False
+            # Set the MIC current limit
+            if self._mic[channel-1].set_current_limit(ilim) is False:
+                return False
+            # Deselect the channel
+            if self._mux.select(0) is False:
+                return False
+            # Done
+            return True
 
 
     ###
@@ -187,6 +468,9 @@ class VSM(object):
     # @param[in]    ilim            Current limit for the MIC (default: 2A)
     # @return       True in case of success; False otherwise
     def ch_limit_A(self, channel, ilim=2):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._limit_A(channel, ilim)
 
 
@@ -197,8 +481,9 @@ class VSM(object):
     # @param[in]    ilim            Current limit for the MIC (default: 2A)
     # @return       True in case of success; False otherwise
     def ch_limit_A_all(self, ilim=2):
+        limit_A = self._limit_A
         for i in range(1,5):
-            if self.ch_limit_A(i, ilim) is False:
+            if limit_A(i, ilim) is False:
                 return False
         return True
 
@@ -209,21 +494,28 @@ class VSM(object):
     # @param[in]    self            The object pointer.
     # @param[in]    channel         Channel to be selected (1-4)
     # @param[in]    imax            Maximum current for the INA (default: 400mA)
-    # @return       True in case of success; False otherwise
+    # @return       True in case of success; False otherwise (raises OSError on INA bus errors)
     def _calibrate_A(self, channel, imax=INA219_CAL_400MA):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Select the channel
-        if self._mux.select(channel) is False:
-            return False
-        # Set the MIC current limit
-        if self._ina[channel].calibrate(imax) is False:
-            return False
-        # Deselect the channel
-        if self._mux.select(0) is False:
-            return False
-        # Done
-        return True
+        # Lock the mux and channel devices
+        with self._lock:
+            # Check if the INA is already calibrated accordingly (kept while powered)
+            if self._ina_cal[channel-1] == imax:
+                return True
+            # Drop cached readings of the channel
+            self.invalidate(channel)
+            try:
+                # Select the channel
+                if self._mux.select(channel) is False:
+                    return False
+                # Calibrate the INA (unknown until the calibration is complete)
+                self._ina_cal[channel-1] = None
+                self._ina[channel-1].calibrate(imax)
+                self._ina_cal[channel-1] = imax
+            finally:
+                # Deselect the channel
+                select_ok = self._mux.select(0)
+            # Return the result
+            return select_ok is not False
 
 
     ###
@@ -234,6 +526,9 @@ class VSM(object):
     # @param[in]    imax            Maximum current for the INA (default: 400mA)
     # @return       True in case of success; False otherwise
     def ch_calibrate_A(self, channel, imax=INA219_CAL_400MA):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._calibrate_A(channel,imax)
 
 
@@ -244,8 +539,9 @@ class VSM(object):
     # @param[in]    imax            Maximum current for the INA (default: 400mA)
     # @return       True in case of success; False otherwise
     def ch_calibrate_A_all(self, imax=INA219_CAL_400MA):
+        calibrate_A = self._calibrate_A
         for i in range(1,5):
-            if self.ch_calibrate_A(i,imax) is False:
+            if calibrate_A(i,imax) is False:
                 return False
         return True
 
@@ -258,19 +554,21 @@ class VSM(object):
     # @param[in]    value           Decimal value of the vout register
     # @return       True in case of success; False otherwise
     def _set_vout(self, channel, value):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Select the channel
-        if self._mux.select(channel) is False:
-            return False
-        # Set the MIC current limit
-        if self._mic[channel].set_output_voltage(value) is False:
-            return False
-        # Deselect the channel
-        if self._mux.select(0) is False:
-            return False
-        # Done
-        return True
+        # Lock the mux and channel devices
+        with self._lock:
+            # Drop cached readings of the channel
+            self.invalidate(channel)
+            # Select the channel
+            if self._mux.select(channel) is False:
+                return False
+            # Set the MIC current limit
+            if self._mic[channel-1].set_output_voltage(value) is False:
+                return False
+            # Deselect the channel
+            if self._mux.select(0) is False:
+                return False
+            # Done
+            return True
 
 
     ###
@@ -281,9 +579,43 @@ class VSM(object):
     # @param[in]    value           Decimal value of the vout register
     # @return       True in case of success; False otherwise
     def ch_set_V_decimal(self, channel, value):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._set_vout(channel,value)
 
 
+    ###
+    # Set the vout value of all channels with a single broadcast write.
+    # All channels are selected at once, so the four MICs (same address) latch the same byte.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    value           Decimal value of the vout register
+    # @return       True in case of success; False otherwise
+    #
+    # @note     Only pure writes can be broadcast; read-modify-write settings (e.g., current
+    #           limit, INA calibration) are still applied channel by channel.
+    def _set_vout_all(self, value):
+        # Lock the mux and channel devices
+        with self._lock:
+            # Drop cached readings of all channels
+            self._cache.clear()
+            # Select all channels
+            if self._mux.select_mask(VSM_MUX_ALL) is False:
+                return False
+            try:
+                # Write the vout register of all MICs at once
+                ret = self._mic[0].set_output_voltage(value)
+            finally:
+                # Deselect the channels
+                self._mux.select(0)
+            # Check return value
+            if ret is False:
+                return False
+            # Done
+            return True
+
+
     ###
     # Set the Vout value of all channels.
     #
@@ -291,10 +623,7 @@ class VSM(object):
     # @param[in]    value           Decimal value of the vout register
     # @return       True in case of success; False otherwise
     def ch_set_V_decimal_all(self, value):
-        for i in range(1,5):
-            if self.ch_set_V_decimal(i,value) is False:
-                return False
-        return True
+        return self._set_vout_all(value)
 
 
     ###
@@ -305,15 +634,25 @@ class VSM(object):
     # @param[in]    volt            Output voltage in volts (V)
     # @return       True in case of success; False otherwise
     def _set_V(self, channel, volt):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
         # Convert volt to decimal value
-        value = self._mic[channel].get_register_from_voltage(volt)
+        value = self.volt2dec(volt)
         # Check if valid value was returned
         if value is False:
             return False
-        # Set the vout value of a given channel.
-        return self._set_vout(channel,value)
+        # Lock the mux and channel devices
+        with self._lock:
+            # Drop cached readings of the channel
+            self.invalidate(channel)
+            # Select the channel
+            if self._mux.select(channel) is False:
+                return False
+            # Set the MIC vout register
+            ret = self._mic[channel-1].set_output_voltage(value)
+            # Deselect the channel
+            if self._mux.select(0) is False:
+                return False
+            # Return the result
+            return ret
 
 
     ###
@@ -324,6 +663,9 @@ class VSM(object):
     # @param[in]    volt            Output voltage in volts (V)
     # @return       True in case of success; False otherwise
     def ch_set_V(self, channel, volt):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._set_V(channel, volt)
 
 
@@ -334,10 +676,13 @@ class VSM(object):
     # @param[in]    volt            Output voltage in volts (V)
     # @return       True in case of success; False otherwise
     def ch_set_V_all(self, volt):
-        for i in range(1,5):
-            if self.ch_set_V(i,volt) is False:
-                return False
-        return True
+        # Convert volt to decimal value
+        value = self.volt2dec(volt)
+        # Check if valid value was returned
+        if value is False:
+            return False
+        # Set the vout value of all channels.
+        return self._set_vout_all(value)
 
 
     ###
@@ -347,21 +692,26 @@ class VSM(object):
     # @param[in]    channel         Channel to be selected (1-4)
     # @return       True in case of success; False otherwise
     def _is_power_good(self, channel):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Select the channel
-        if self._mux.select(channel) is False:
-            return False
-        # Set the MIC current limit
-        ret = self._mic[channel].is_power_good()
-        # Check return value
-        if ret is False:
-            return False
-        # Deselect the channel
-        if self._mux.select(0) is False:
-            return False
-        # Return the result
-        return ret
+        # Lock the mux and channel devices
+        with self._lock:
+            # Use a recent reading if available
+            ret = self._cache_get((channel, 'PG'))
+            if ret is not None:
+                return ret
+            # Select the channel
+            if self._mux_select(channel) is False:
+                return False
+            # Set the MIC current limit
+            ret = self._mic[channel-1].is_power_good()
+            # Check return value
+            if ret is False:
+                return False
+            # Deselect the channel
+            if self._mux_select(0) is False:
+                return False
+            # Cache and return the result
+            self._cache_put((channel, 'PG'), ret)
+            return ret
 
 
     ###
@@ -371,6 +721,9 @@ class VSM(object):
     # @param[in]    channel         Channel to be selected (1-4)
     # @return       True in case of success; False otherwise
     def ch_is_power_good(self, channel):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._is_power_good(channel)
 
 
@@ -380,8 +733,9 @@ class VSM(object):
     # @param[in]    self            The object pointer.
     # @return       True in case of success; False otherwise
     def ch_is_power_good_all(self):
+        is_power_good = self._is_power_good
         for i in range(1,5):
-            if self._is_power_good(i) is False:
+            if not is_power_good(i):
                 return False
         return True
 
@@ -394,20 +748,19 @@ class VSM(object):
     # @param[in]    timeout         Timeout in milliseconds (ms; default: 1s)
     # @return       True in case of success; False otherwise
     def _wait_power_good(self, channel, timeout=1000):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Time-passed counter
-        passed = 0
-        # Wait for power-good
-        while self._is_power_good(channel) is False:
+        # Absolute deadline
+        deadline = time.monotonic() + timeout/1000
+        # Initial poll interval (doubled up to 10ms)
+        delay = 0.001
+        # Wait for power-good (not good or read error)
+        while not self._is_power_good(channel):
             # check if timeout has already been reached
-            if passed >= timeout:
+            if time.monotonic() >= deadline:
                 # Timeout
                 return False
-            # wait for 10ms
-            time.sleep(0.01)
-            # increment timeout counter by 10ms
-            passed += 10
+            # back off
+            time.sleep(delay)
+            delay = min(delay*2, 0.01)
         return True
 
 
@@ -419,6 +772,9 @@ class VSM(object):
     # @param[in]    timeout         Timeout in milliseconds (ms; default: 1s)
     # @return       True in case of success; False otherwise
     def ch_wait_power_good(self,channel,timeout=1000):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
         return self._wait_power_good(channel,timeout)
 
 
@@ -429,20 +785,26 @@ class VSM(object):
     # @param[in]    timeout         Timeout in milliseconds (ms; default: 1s)
     # @return       True in case of success; False otherwise
     def ch_wait_power_good_all(self,timeout=1000):
-        # Time-passed counter
-        passed = 0
-        # Wait for power-good
-        while self.ALL_is_power_good() is False:
+        is_power_good = self._is_power_good
+        # Absolute deadline
+        deadline = time.monotonic() + timeout/1000
+        # Initial poll interval (doubled up to 10ms)
+        delay = 0.001
+        # Channels still waiting for power-good
+        pending = [1, 2, 3, 4]
+        while True:
+            # Only poll the channels that are not good yet
+            pending = [i for i in pending if not is_power_good(i)]
+            if not pending:
+                # Everything ok
+                return True
             # check if timeout has already been reached
-            if passed >= timeout:
+            if time.monotonic() >= deadline:
                 # Timeout
                 return False
-            # wait for 10ms
-            time.sleep(0.01)
-            # increment timeout counter by 10ms
-            passed += 10
-        # Everything ok
-        return True
+            # back off
+            time.sleep(delay)
+            delay = min(delay*2, 0.01)
 
 
     ###
@@ -450,23 +812,33 @@ class VSM(object):
     #
     # @param[in]    self            The object pointer.
     # @param[in]    channel         Channel to be selected (1-4)
-    # @return       Voltage in volts (V) in case of success; otherwise False.
-    def _get_V(self, channel):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Select the channel
-        if self._mux.select(channel) is False:
-            return False
-        # Set the MIC current limit
-        volts = self._ina[channel].get_bus_voltage_V()
-        # Check return value
-        if volts is False:
-            return False
-        # Deselect the channel
-        if self._mux.select(0) is False:
-            return False
-        # Return the result
-        return volts
+    # @param[in]    wait_ready      Wait for a new INA conversion result (default: False)
+    # @param[in]    release         Deselect the channel afterwards (default: True)
+    # @return       Voltage in volts (V); False if the channel cannot be selected (or on timeout).
+    def _get_V(self, channel, wait_ready=False, release=True):
+        # Lock the mux and channel devices
+        with self._lock:
+            # Use a recent reading if available (unless a fresh sample is requested)
+            ret = None if wait_ready else self._cache_get((channel, 'V'))
+            if ret is not None:
+                return ret
+            # Select the channel
+            if self._mux_select(channel) is False:
+                return False
+            try:
+                ina = self._ina[channel-1]
+                # Wait for a fresh sample (if requested)
+                if wait_ready and not ina.wait_conversion():
+                    return False
+                # Read the INA (bus errors are raised)
+                ret = self._ina_get_V[channel-1]()
+            finally:
+                # Deselect the channel (unless the caller keeps using the mux)
+                if release:
+                    self._mux_select(0)
+            # Cache and return the result
+            self._cache_put((channel, 'V'), ret)
+            return ret
 
 
     ###
@@ -474,25 +846,40 @@ class VSM(object):
     #
     # @param[in]    self            The object pointer.
     # @param[in]    channel         Channel to be selected (1-4)
+    # @param[in]    wait_ready      Wait for a new INA conversion result (default: False)
+    # @param[in]    release         Deselect the channel afterwards (default: True)
     # @return       Voltage in volts (V) in case of success; otherwise False.
-    def ch_get_V(self, channel):
-        return self._get_V(channel)
+    def ch_get_V(self, channel, wait_ready=False, release=True):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
+        return self._get_V(channel, wait_ready, release)
 
 
     ###
     # Get the bus voltage (INA) of all channels.
+    # The INAs are always read (no cached readings are used); the readings refresh the cache.
     #
     # @param[in]    self        The object pointer.
     # @return       List of voltages in volts (V) in case of success; otherwise False.
     def ch_get_V_all(self):
-        volts = ()
-        for i in range(1,5):
-            ret = self.ch_get_V(i)
-            if ret:
-                volts.append(ret)
-            else:
-                return False
-        return volts
+        # Lock the mux and channel devices
+        with self._lock:
+            select = self._mux_select
+            cache_put = self._cache_put
+            volts = [0.0]*4
+            try:
+                for i, get_V in enumerate(self._ina_get_V, 1):
+                    # Select the next channel (no deselect in between)
+                    if select(i) is False:
+                        return False
+                    volts[i-1] = get_V()
+                    cache_put((i, 'V'), volts[i-1])
+            finally:
+                # Deselect the channel
+                select(0)
+            # Return the result
+            return volts
 
 
     ###
@@ -500,23 +887,33 @@ class VSM(object):
     #
     # @param[in]    self            The object pointer.
     # @param[in]    channel         Channel to be selected (1-4)
-    # @return       Current in milliamps (mA) in case of success; otherwise False.
-    def _get_mA(self, channel):
-        # Check the given channel
-        assert 1 <= channel <= 4, 'Channel can only be between 1 and 4'
-        # Select the channel
-        if self._mux.select(channel) is False:
-            return False
-        # Set the MIC current limit
-        amps = self._ina[channel].get_current_mA()
-        # Check return value
-        if amps is False:
-            return False
-        # Deselect the channel
-        if self._mux.select(0) is False:
-            return False
-        # Return the result
-        return amps
+    # @param[in]    wait_ready      Wait for a new INA conversion result (default: False)
+    # @param[in]    release         Deselect the channel afterwards (default: True)
+    # @return       Current in milliamps (mA); False if the channel cannot be selected (or on timeout).
+    def _get_mA(self, channel, wait_ready=False, release=True):
+        # Lock the mux and channel devices
+        with self._lock:
+            # Use a recent reading if available (unless a fresh sample is requested)
+            ret = None if wait_ready else self._cache_get((channel, 'mA'))
+            if ret is not None:
+                return ret
+            # Select the channel
+            if self._mux_select(channel) is False:
+                return False
+            try:
+                ina = self._ina[channel-1]
+                # Wait for a fresh sample (if requested)
+                if wait_ready and not ina.wait_conversion():
+                    return False
+                # Read the INA (bus errors are raised)
+                ret = self._ina_get_mA[channel-1]()
+            finally:
+                # Deselect the channel (unless the caller keeps using the mux)
+                if release:
+                    self._mux_select(0)
+            # Cache and return the result
+            self._cache_put((channel, 'mA'), ret)
+            return ret
 
 
     ###
@@ -524,25 +921,263 @@ class VSM(object):
     #
     # @param[in]    self            The object pointer.
     # @param[in]    channel         Channel to be selected (1-4)
+    # @param[in]    wait_ready      Wait for a new INA conversion result (default: False)
+    # @param[in]    release         Deselect the channel afterwards (default: True)
     # @return       Current in milliamps (mA) in case of success; otherwise False.
-    def ch_get_mA(self, channel):
-        return self._get_mA(channel)
+    def ch_get_mA(self, channel, wait_ready=False, release=True):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
+        return self._get_mA(channel, wait_ready, release)
 
 
     ###
     # Get the current (INA) of all channels.
+    # The INAs are always read (no cached readings are used); the readings refresh the cache.
     #
     # @param[in]    self            The object pointer.
     # @return       List of currents in milliamps (mA) in case of success; otherwise False.
     def ch_get_mA_all(self):
-        amps = ()
-        for i in range(1,5):
-            ret = self.ch_get_mA(i)
-            if ret:
-                amps.append(ret)
-            else:
+        # Lock the mux and channel devices
+        with self._lock:
+            select = self._mux_select
+            cache_put = self._cache_put
+            amps = [0.0]*4
+            try:
+                for i, get_mA in enumerate(self._ina_get_mA, 1):
+                    # Select the next channel (no deselect in between)
+                    if select(i) is False:
+                        return False
+                    amps[i-1] = get_mA()
+                    cache_put((i, 'mA'), amps[i-1])
+            finally:
+                # Deselect the channel
+                select(0)
+            # Return the result
+            return amps
+
+
+    ###
+    # Get the bus voltage and current (INA) of a given channel (1-4) with a single selection.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    channel         Channel to be selected (1-4)
+    # @param[in]    release         Deselect the channel afterwards (default: True)
+    # @return       Tuple of (V, mA); False if the channel cannot be selected.
+    def _get_VA(self, channel, release=True):
+        # Lock the mux and channel devices
+        with self._lock:
+            # Select the channel
+            if self._mux_select(channel) is False:
                 return False
-        return amps
+            try:
+                # Read both INA registers back-to-back (bus errors are raised)
+                ina = self._ina[channel-1]
+                volt = ina.get_bus_voltage_V()
+                curr = ina.get_current_mA()
+            finally:
+                # Deselect the channel (unless the caller keeps using the mux)
+                if release:
+                    self._mux_select(0)
+            # Cache and return the result
+            self._cache_put((channel, 'V'), volt)
+            self._cache_put((channel, 'mA'), curr)
+            return (volt, curr)
+
+
+    ###
+    # Get the bus voltage and current (INA) of a given channel (1-4).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    channel         Channel to be selected (1-4)
+    # @param[in]    release         Deselect the channel afterwards (default: True)
+    # @return       Tuple of (V, mA) in case of success; otherwise False.
+    def ch_get_VA(self, channel, release=True):
+        # Check the given channel
+        if not 1 <= channel <= 4:
+            raise ValueError('Channel can only be between 1 and 4')
+        return self._get_VA(channel, release)
+
+
+    ###
+    # Get the bus voltage and current (INA) of all channels (see snapshot).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       List of (V, mA) tuples (channel 1-4) in case of success; otherwise False.
+    def ch_get_VA_all(self):
+        return self.snapshot()
+
+
+    ###
+    # Get the bus voltage and current (INA) of all channels in a single pass.
+    # Each channel is selected only once for both register reads.
+    # The INAs are always read (no cached readings are used); the readings refresh the cache.
+    #
+    # @param[in]    self            The object pointer.
+    # @return       List of (V, mA) tuples (channel 1-4) in case of success; otherwise False.
+    def snapshot(self):
+        # Lock the mux and channel devices
+        with self._lock:
+            select = self._mux_select
+            cache_put = self._cache_put
+            values = [None]*4
+            try:
+                for i, (get_V, get_mA) in enumerate(zip(self._ina_get_V, self._ina_get_mA), 1):
+                    # Select the channel
+                    if select(i) is False:
+                        return False
+                    # Read voltage and current while the channel is selected
+                    volt = get_V()
+                    curr = get_mA()
+                    values[i-1] = (volt, curr)
+                    cache_put((i, 'V'), volt)
+                    cache_put((i, 'mA'), curr)
+            finally:
+                # Deselect the channel
+                select(0)
+            # Return the result
+            return values
+
+
+    ###
+    # Stream the current (INA) of a given channel (1-4) at a fixed sampling period.
+    # The channel stays selected for the whole run, so the INA (in continuous mode)
+    # is read back-to-back without any mux traffic in between.
+    # Each period is slept except for its last 100us, which are busy-waited for precise timing.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    channel         Channel to be selected (1-4)
+    # @param[in]    samples         Number of samples to be taken
+    # @param[in]    period_us       Sampling period in microseconds (us; default: 1ms)
+    # @return       List of currents in milliamps (mA).
+    #
+    # @note     The VSM is locked for the whole run (samples * period_us); other VSM calls
+    #           (including the background sampler) wait until the run is finished.
+    def stream_channel(self, channel, samples, period_us=1000):
+        # Check the given parameters
+        if samples <= 0:
+            raise ValueError('Number of samples has to be positive')
+        if period_us <= 0:
+            raise ValueError('Sampling period has to be positive')
+        values = [0.0]*samples
+        period_ns = int(period_us * 1000)
+        # Keep the channel selected during the whole run
+        with self.mux(channel) as (mic, ina):
+            get_current_mA = ina.get_current_mA
+            monotonic_ns = time.monotonic_ns
+            sleep = time.sleep
+            next_ns = monotonic_ns()
+            for k in range(samples):
+                # Sleep for most of the remaining time
+                remaining = next_ns - monotonic_ns() - VSM_STREAM_SPIN_NS
+                if remaining > 0:
+                    sleep(remaining / 1e9)
+                # Busy-wait for the next sampling instant
+                while monotonic_ns() < next_ns:
+                    pass
+                values[k] = get_current_mA()
+                next_ns += period_ns
+        # Return the result
+        return values
+
+
+    ###
+    # Start sampling all channels (see snapshot) periodically in a background thread.
+    # The samples are written to a fixed-size ring buffer (oldest samples are overwritten).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    period_ms       Sampling period in milliseconds (ms; default: 10ms)
+    # @param[in]    size            Number of samples kept in the ring buffer (default: 1000)
+    # @param[in]    callback        Function called with (timestamp, values) for every sample (default: None)
+    # @return       True in case of success; False if the sampler is already running.
+    #
+    # @note     Exceptions raised by the callback are ignored (the sampler keeps running).
+    def start_sampler(self, period_ms=10, size=1000, callback=None):
+        # Check the given parameters
+        if period_ms <= 0:
+            raise ValueError('Sampling period has to be positive')
+        if size <= 0:
+            raise ValueError('Ring buffer size has to be positive')
+        # Check if the sampler is already running (a terminated thread is discarded)
+        if self._sampler is not None and self._sampler.is_alive():
+            return False
+        # Prepare the ring buffer
+        self._samples = [None]*size
+        self._samples_head = 0
+        self._sampler_stop.clear()
+        # Start the sampler thread
+        self._sampler = threading.Thread(target=self._sampler_run, args=(period_ms/1000, callback), daemon=True)
+        self._sampler.start()
+        return True
+
+
+    ###
+    # Stop the background sampler (the ring buffer is kept).
+    #
+    # @param[in]    self            The object pointer.
+    def stop_sampler(self):
+        # Check if the sampler is running
+        if self._sampler is None:
+            return
+        # Stop the sampler thread and wait for it to finish
+        self._sampler_stop.set()
+        self._sampler.join()
+        self._sampler = None
+
+
+    ###
+    # Get the samples of the background sampler.
+    #
+    # @param[in]    self            The object pointer.
+    # @return       List of (timestamp, values) tuples (oldest first); values as returned by snapshot.
+    def get_samples(self):
+        samples = self._samples
+        head = self._samples_head
+        size = len(samples)
+        # Check if the ring buffer has already wrapped around
+        if head <= size:
+            return samples[:head]
+        idx = head % size
+        return samples[idx:] + samples[:idx]
+
+
+    ###
+    # Sampler thread function (single producer of the ring buffer).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    period          Sampling period in seconds
+    # @param[in]    callback        Function called with (timestamp, values) for every sample
+    def _sampler_run(self, period, callback):
+        samples = self._samples
+        size = len(samples)
+        snapshot = self.snapshot
+        stop = self._sampler_stop
+        monotonic = time.monotonic
+        next_time = monotonic()
+        while not stop.is_set():
+            timestamp = monotonic()
+            try:
+                values = snapshot()
+            except OSError:
+                # Bus error; resynchronize the mux on the next sample
+                self.invalidate()
+                values = False
+            # Store the sample (if successful)
+            if values is not False:
+                samples[self._samples_head % size] = (timestamp, values)
+                self._samples_head += 1
+                if callback is not None:
+                    try:
+                        callback(timestamp, values)
+                    except Exception:
+                        # Do not let a faulty callback stop the sampler
+                        pass
+            # Wait for the next sampling instant (skip missed instants)
+            next_time += period
+            now = monotonic()
+            if next_time < now:
+                next_time = now
+            stop.wait(next_time - now)
 
 
     ###
@@ -553,7 +1188,7 @@ class VSM(object):
     # @preturn      Decimal value in case of success; otherwise False.
     def volt2dec(self, volt):
         # Return the result
-        return self._mic[1].get_register_from_voltage(volt)
+        return self._mic[0].get_register_from_voltage(volt)
 
 
     ###
@@ -564,4 +1199,4 @@ class VSM(object):
     # @return       Voltage in volts (V) in case of success; otherwise False.
     def dec2volt(self, decimal):
         # Return the result
-        return self._mic[1].get_voltage_from_register(decimal)
+        return self._mic[0].get_voltage_from_register(decimal)
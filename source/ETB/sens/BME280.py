@@ -17,14 +17,18 @@
 # @example  pres = bme.read_pressure()    # Read the current pressure [hPa]
 # @example  humi = bme.read_humidity()    # Read the current relative humidity [%]
 # @example  dewp = bme.read_dewpoint()    # Calculate the dewpoint [°C]
+# @example  t, p, h = bme.read_all()      # Read all values of the same sample
+# @example  t, p, h = bme.read_batch(100) # Read 100 samples as numpy arrays
 #####
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
 # time (for sleep method)
 import time
+# struct (for unpacking register data)
+import struct
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_check_clock, I2C_get_bus
 
 
 ##### GLOBAL VARIABLES #####
@@ -66,6 +70,9 @@ BME280_REG_DIG_H4       = 0xE4  # signed short
 BME280_REG_DIG_H5       = 0xE5  # signed short
 BME280_REG_DIG_H6       = 0xE6  # signed short
 BME280_REG_DIG_H7       = 0xE7  # signed short
+# Length of the calibration data blocks
+BME280_CALIB_T_P_LEN    = 26    # 0x88 ... 0xA1 (dig_T1 ... dig_H1)
+BME280_CALIB_H_LEN      = 7     # 0xE1 ... 0xE7 (dig_H2 ... dig_H6)
 ### Settings ###
 # Oversampling of data (osrs_X)
 BME280_OSRS_T_OFFSET    = 5
@@ -117,8 +124,138 @@ BME280_SPI2W_EN_OFFSET  = 0
 BME280_SPI2W_EN_MASK    = 0xFE
 BME280_SPI2W_EN_OFF     = 0
 BME280_SPI2W_EN_ON      = 1
+### Status ###
+# Conversion running (measuring)
+BME280_STATUS_MEASURING = 0x08
 ### RESET ###
 BME280_RESET_VALUE      = 0xB6
+### Timing ###
+# Minimum recommended I2C bus clock (fast mode) [Hz]
+BME280_I2C_CLOCK        = 400000
+# Status polling interval while waiting for a conversion [s]
+BME280_POLL_INTERVAL    = 0.0005
+### Raw data ###
+# Number of data bytes (press_msb ... hum_lsb)
+BME280_RAW_LEN          = 8
+# Time a burst-read raw sample is reused [s]
+BME280_RAW_CACHE_TTL    = 0.01
+# Layout of the raw data block (press_msb/lsb, press_xlsb, temp_msb/lsb, temp_xlsb, hum_msb/lsb)
+BME280_RAW_STRUCT       = struct.Struct('>HBHBH')
+
+
+##### COMPENSATION #####
+###
+# Decode the raw data block (0xF7 ... 0xFE).
+#
+# @param[in]    data            Raw data block (8 bytes).
+# @return       Tuple of raw (temperature, pressure, humidity) values.
+def _bme280_decode_raw(data):
+    p_16, p_xlsb, t_16, t_xlsb, raw_h = BME280_RAW_STRUCT.unpack(bytes(data))
+    return ((t_16 << 4) | (t_xlsb >> 4), (p_16 << 4) | (p_xlsb >> 4), raw_h)
+
+###
+# Calculate the fine resolution temperature value (see datasheet 8.2).
+#
+# @param[in]    raw             Raw temperature value.
+# @param[in]    T1 ... T3       Temperature calibration values.
+# @return       Fine resolution temperature value (t_fine).
+def _bme280_t_fine(raw, T1, T2, T3):
+    var1 = (((raw>>3) - (T1<<1)) * T2) >> 11
+    var2 = (((((raw>>4) - T1) * ((raw>>4) - T1)) >> 12) * T3) >> 14
+    return var1 + var2
+
+###
+# Calculate the compensated pressure value (see datasheet 8.2).
+#
+# @param[in]    raw             Raw pressure value.
+# @param[in]    t_fine          Fine resolution temperature value.
+# @param[in]    P1 ... P9       Pressure calibration values.
+# @return       Pressure value [hPa] in case of success; otherwise False.
+def _bme280_pressure(raw, t_fine, P1, P2, P3, P4, P5, P6, P7, P8, P9):
+    var1 = (t_fine>>1) - 64000
+    var2 = (((var1>>2) * (var1>>2)) >> 11) * P6
+    var2 = var2 + ((var1*P5)<<1)
+    var2 = (var2>>2) + (P4<<16)
+    var1 = (((P3 * (((var1>>2) * (var1>>2)) >> 13)) >> 3) + ((P2 * var1) >> 1)) >> 18
+    var1 = ((32768+var1) * P1) >> 15
+    # Avoid division by zero
+    if var1==0:
+        return False
+    p = ((1048576-raw) - (var2>>12)) * 3125
+    if p<0x80000000:
+        p = int((p << 1) / var1)
+    else:
+        p = int((p / var1) * 2)
+    var1 = (P9 * (((p>>3) * (p>>3))>>13))>>12
+    var2 = ((p>>2) * P8)>>13
+    return (p + ((var1 + var2 + P7) >> 4)) / 100.0
+
+###
+# Calculate the compensated humidity value (see datasheet 4.2.3, integer version).
+#
+# @param[in]    raw             Raw humidity value.
+# @param[in]    t_fine          Fine resolution temperature value.
+# @param[in]    H1 ... H6       Humidity calibration values.
+# @return       Humidity value [% RH] (limited to 0...100).
+def _bme280_humidity(raw, t_fine, H1, H2, H3, H4, H5, H6):
+    v = t_fine - 76800
+    v = (((((raw<<14) - (H4<<20) - (H5*v)) + 16384) >> 15) *
+         (((((((v*H6) >> 10) * (((v*H3) >> 11) + 32768)) >> 10) + 2097152) * H2 + 8192) >> 14))
+    v = v - (((((v>>15) * (v>>15)) >> 7) * H1) >> 4)
+    # Limit to 0...100 % RH (Q22.10)
+    v = min(max(v, 0), 419430400)
+    return (v >> 12) / 1024.0
+
+###
+# Compensate arrays of raw samples at once (vectorized version of the kernels above).
+# All intermediate values are int64 and use the same (floor) shifts and truncating
+# division as the scalar kernels, so the results are identical.
+#
+# @param[in]    raw             Raw (temperature, pressure, humidity) values (numpy int64 array, shape (n, 3)).
+# @param[in]    cal_T           Temperature calibration values (T1 ... T3).
+# @param[in]    cal_P           Pressure calibration values (P1 ... P9).
+# @param[in]    cal_H           Humidity calibration values (H1 ... H6).
+# @return       Tuple of (t_fine, temperature [°C], pressure [hPa; NaN if invalid], humidity [% RH]) arrays.
+def _bme280_compensate_batch(raw, cal_T, cal_P, cal_H):
+    # numpy (only needed for batched reads)
+    import numpy as np
+    T1, T2, T3 = cal_T
+    P1, P2, P3, P4, P5, P6, P7, P8, P9 = cal_P
+    H1, H2, H3, H4, H5, H6 = cal_H
+    raw_t = raw[:, 0]
+    raw_p = raw[:, 1]
+    raw_h = raw[:, 2]
+    # Temperature (see _bme280_t_fine)
+    var1 = (((raw_t>>3) - (T1<<1)) * T2) >> 11
+    var2 = (((((raw_t>>4) - T1) * ((raw_t>>4) - T1)) >> 12) * T3) >> 14
+    t_fine = var1 + var2
+    temperature = ((t_fine * 5 + 128) >> 8) / 100.0
+    # Pressure (see _bme280_pressure)
+    var1 = (t_fine>>1) - 64000
+    var2 = (((var1>>2) * (var1>>2)) >> 11) * P6
+    var2 = var2 + ((var1*P5)<<1)
+    var2 = (var2>>2) + (P4<<16)
+    var1 = (((P3 * (((var1>>2) * (var1>>2)) >> 13)) >> 3) + ((P2 * var1) >> 1)) >> 18
+    var1 = ((32768+var1) * P1) >> 15
+    # Avoid division by zero (resulting samples are set to NaN)
+    invalid = (var1 == 0)
+    var1[invalid] = 1
+    # Both branches of the scalar kernel equal (p*2)/var1 truncated towards zero
+    p = (((1048576-raw_p) - (var2>>12)) * 3125) << 1
+    q = np.floor_divide(np.abs(p), np.abs(var1))
+    p = np.where((p < 0) != (var1 < 0), -q, q)
+    var1 = (P9 * (((p>>3) * (p>>3))>>13))>>12
+    var2 = ((p>>2) * P8)>>13
+    pressure = (p + ((var1 + var2 + P7) >> 4)) / 100.0
+    pressure[invalid] = np.nan
+    # Humidity (see _bme280_humidity)
+    v = t_fine - 76800
+    v = (((((raw_h<<14) - (H4<<20) - (H5*v)) + 16384) >> 15) *
+         (((((((v*H6) >> 10) * (((v*H3) >> 11) + 32768)) >> 10) + 2097152) * H2 + 8192) >> 14))
+    v = v - (((((v>>15) * (v>>15)) >> 7) * H1) >> 4)
+    humidity = (np.clip(v, 0, 419430400) >> 12) / 1024.0
+    # Return the resulting values
+    return (t_fine, temperature, pressure, humidity)
 
 
 #####
@@ -138,11 +275,37 @@ class BME280(object):
         # Object's own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Object's own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Object's I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
+        # Check the bus clock (an 8-byte burst read takes ~4x longer at 100 kHz)
+        I2C_check_clock(BME280_I2C_CLOCK, busnum)
         # @var __t_fine
         # Object's own fine resolution temperature value (initially 0.0)
         self.__t_fine = 0.0
+        # @var __raw
+        # Last burst-read raw sample (temperature, pressure, humidity)
+        self.__raw = None
+        # @var __raw_time
+        # Time of the last burst read (monotonic) [s]
+        self.__raw_time = 0.0
+        # @var __shadow
+        # Shadow copies of the control/config registers (this driver is the only writer)
+        self.__shadow = {}
+        # @var __mode
+        # Current mode of operation (sleep after power-on/reset)
+        self.__mode = BME280_MODE_SLEEP
+        # @var __wait_ready
+        # Wait for a completed conversion before the next raw read
+        self.__wait_ready = True
+        # @var __osrs
+        # Current oversampling settings (temperature, pressure, humidity)
+        self.__osrs = [0, 0, 0]
+        # @var __t_conv
+        # Expected (maximum) conversion time [ms]
+        self.__t_conv = self._conversion_time()
+        # @var __t_sb
+        # Standby time in normal mode [ms] (0.5ms after power-on/reset)
+        self.__t_sb = 0.5
 
         # Load calibration values
         self._load_calibration()
@@ -171,7 +334,8 @@ class BME280(object):
     # @return       True in case of success; otherwise False.
     def _i2c_write_8(self, register, value):
         # Write the given value to the specified register
-        return self.__bus.write_byte_data(self.__i2c_address, register, (value&0xFF))
+        with self.__lock:
+            return self.__bus.write_byte_data(self.__i2c_address, register, (value&0xFF))
 
 
     ###
@@ -182,7 +346,35 @@ class BME280(object):
     # @return       True in case of success; otherwise False.
     def _i2c_read_U8(self, register):
         # Read value from the specified register
-        return (self.__bus.read_byte_data(self.__i2c_address, register) & 0xFF)
+        with self.__lock:
+            return (self.__bus.read_byte_data(self.__i2c_address, register) & 0xFF)
+
+
+    ###
+    # Read a control/config register from its shadow copy (the bus is only read on the first access).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    register        The I2C register address.
+    # @return       Register value in case of success; otherwise False.
+    def _i2c_read_shadowed(self, register):
+        reg = self.__shadow.get(register)
+        if reg is None:
+            reg = self._i2c_read_U8(register)
+            self.__shadow[register] = reg
+        return reg
+
+
+    ###
+    # Write a control/config register and update its shadow copy.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    register        The I2C register address.
+    # @param[in]    value           The byte value to be written.
+    # @return       True in case of success; otherwise False.
+    def _i2c_write_shadowed(self, register, value):
+        ret = self._i2c_write_8(register, value)
+        self.__shadow[register] = value & 0xFF
+        return ret
 
 
     ###
@@ -211,15 +403,10 @@ class BME280(object):
     # @param[in]    little_endian   Endianess of the value (true if little)
     # @return       Unsigned word value in case of success; otherwise False.
     def _i2c_read_U16(self, register, little_endian=True):
-        # Read word value from the I2C register
-        result = self.__bus.read_word_data(self.__i2c_address,register) & 0xFFFF
-        # Check return value
-        if result is False:
-            return False
-        # Swap bytes if using big endian
-        if little_endian is False:
-            result = ((result << 8) & 0xFF00) + (result >> 8)
-        return result
+        # Read both bytes with a single block read
+        with self.__lock:
+            data = bytes(self.__bus.read_i2c_block_data(self.__i2c_address, register, 2))
+        return struct.unpack('<H' if little_endian else '>H', data)[0]
 
 
     ###
@@ -240,15 +427,10 @@ class BME280(object):
     # @param[in]    little_endian   Endianess of the value (true if little)
     # @return       Signed word value in case of success; otherwise False.
     def _i2c_read_S16(self, register, little_endian=True):
-        # First, read the value as unsigned word
-        result = self._i2c_read_U16(register, little_endian)
-        # Check return value
-        if result is False:
-            return False
-        # Check for sign bit and turn into a negative value if set.
-        if result & 0x8000 != 0:
-            result -= 1 << 16
-        return result
+        # Read both bytes with a single block read
+        with self.__lock:
+            data = bytes(self.__bus.read_i2c_block_data(self.__i2c_address, register, 2))
+        return struct.unpack('<h' if little_endian else '>h', data)[0]
 
 
     ###
@@ -311,6 +493,13 @@ class BME280(object):
     # @param[in]    self            The object pointer.
     # @return       True in case of success; otherwise False.
     def reset(self):
+        # Registers return to their reset values
+        self.__shadow.clear()
+        self.__mode = BME280_MODE_SLEEP
+        self.__wait_ready = True
+        self.__osrs = [0, 0, 0]
+        self.__t_conv = self._conversion_time()
+        self.__t_sb = 0.5
         return self._i2c_write_8(BME280_REG_RESET, BME280_RESET_VALUE)
 
 
@@ -325,14 +514,17 @@ class BME280(object):
         if (mode<BME280_MODE_SLEEP) or (mode>BME280_MODE_NORMAL):
             return False
         # Get the current register value
-        reg = self.get_ctrl_meas()
+        reg = self._i2c_read_shadowed(BME280_REG_CTRL_MEAS)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_MODE_MASK) | (mode<<BME280_MODE_OFFSET)
+        # Wait for the first conversion in the new mode
+        self.__mode = mode
+        self.__wait_ready = True
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CTRL_MEAS, reg)
+        return self._i2c_write_shadowed(BME280_REG_CTRL_MEAS, reg)
 
 
     ###
@@ -346,14 +538,17 @@ class BME280(object):
         if sample not in BME280_OSRS:
             raise ValueError('Valid OSRS values are: 0, 1, 2, 4, 8, 16')
         # Get the current register value
-        reg = self.get_ctrl_meas()
+        reg = self._i2c_read_shadowed(BME280_REG_CTRL_MEAS)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_OSRS_T_MASK) | (BME280_OSRS[sample]<<BME280_OSRS_T_OFFSET)
+        # Update the expected conversion time
+        self.__osrs[0] = sample
+        self.__t_conv = self._conversion_time()
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CTRL_MEAS, reg)
+        return self._i2c_write_shadowed(BME280_REG_CTRL_MEAS, reg)
 
 
     ###
@@ -367,14 +562,17 @@ class BME280(object):
         if sample not in BME280_OSRS:
             raise ValueError('Valid OSRS values are: 0, 1, 2, 4, 8, 16')
         # Get the current register value
-        reg = self.get_ctrl_meas()
+        reg = self._i2c_read_shadowed(BME280_REG_CTRL_MEAS)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_OSRS_P_MASK) | (BME280_OSRS[sample]<<BME280_OSRS_P_OFFSET)
+        # Update the expected conversion time
+        self.__osrs[1] = sample
+        self.__t_conv = self._conversion_time()
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CTRL_MEAS, reg)
+        return self._i2c_write_shadowed(BME280_REG_CTRL_MEAS, reg)
 
 
     ###
@@ -388,14 +586,17 @@ class BME280(object):
         if sample not in BME280_OSRS:
             raise ValueError('Valid OSRS values are: 0, 1, 2, 4, 8, 16')
         # Get the current register value
-        reg = self.get_ctrl_hum()
+        reg = self._i2c_read_shadowed(BME280_REG_CTRL_HUM)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_OSRS_H_MASK) | (BME280_OSRS[sample]<<BME280_OSRS_H_OFFSET)
+        # Update the expected conversion time
+        self.__osrs[2] = sample
+        self.__t_conv = self._conversion_time()
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CTRL_HUM, reg)
+        return self._i2c_write_shadowed(BME280_REG_CTRL_HUM, reg)
 
 
     ###
@@ -409,14 +610,16 @@ class BME280(object):
         if stby not in BME280_T_SB:
             raise ValueError('Valid T_SB values are: 0.5, 10, 20, 62.5, 125, 250, 500, 1000')
         # Get the current register value
-        reg = self.get_config()
+        reg = self._i2c_read_shadowed(BME280_REG_CONFIG)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_T_SB_MASK) | (BME280_T_SB[stby]<<BME280_T_SB_OFFSET)
+        # Keep the standby time (for the measurement cycle in normal mode)
+        self.__t_sb = stby
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CONFIG, reg)
+        return self._i2c_write_shadowed(BME280_REG_CONFIG, reg)
 
 
     ###
@@ -430,14 +633,14 @@ class BME280(object):
         if filter_m not in BME280_FILTER:
             raise ValueError('Valid filter values are: 0 (off), 2, 4, 8, 16')
         # Get the current register value
-        reg = self.get_config()
+        reg = self._i2c_read_shadowed(BME280_REG_CONFIG)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_FILTER_MASK) | (BME280_FILTER[filter_m]<<BME280_FILTER_OFFSET)
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CONFIG, reg)
+        return self._i2c_write_shadowed(BME280_REG_CONFIG, reg)
 
 
     ###
@@ -447,14 +650,14 @@ class BME280(object):
     # @return       True in case of success; otherwise False.
     def spi_enable(self):
         # Get the current register value
-        reg = self.get_config()
+        reg = self._i2c_read_shadowed(BME280_REG_CONFIG)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_SPI2W_EN_MASK) | (BME280_SPI2W_EN_ON<<BME280_SPI2W_EN_OFFSET)
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CONFIG, reg)
+        return self._i2c_write_shadowed(BME280_REG_CONFIG, reg)
 
 
     ###
@@ -464,14 +667,14 @@ class BME280(object):
     # @return       True in case of success; otherwise False.
     def spi_disable(self):
         # Get the current register value
-        reg = self.get_config()
+        reg = self._i2c_read_shadowed(BME280_REG_CONFIG)
         # Check return value
         if reg is False:
             return False
         # Prepare new register value
         reg = (reg & BME280_SPI2W_EN_MASK) | (BME280_SPI2W_EN_OFF<<BME280_SPI2W_EN_OFFSET)
         # Write the new value to the sensor
-        return self._i2c_write_8(BME280_REG_CONFIG, reg)
+        return self._i2c_write_shadowed(BME280_REG_CONFIG, reg)
 
 
     ###
@@ -479,27 +682,40 @@ class BME280(object):
     #
     # @param[in]    self            The object pointer.
     def _load_calibration(self):
-        # temperature
-        self.dig_T1 = self._i2c_read_U16LE(BME280_REG_DIG_T1)
-        self.dig_T2 = self._i2c_read_S16LE(BME280_REG_DIG_T2)
-        self.dig_T3 = self._i2c_read_S16LE(BME280_REG_DIG_T3)
-        # pressure
-        self.dig_P1 = self._i2c_read_U16LE(BME280_REG_DIG_P1)
-        self.dig_P2 = self._i2c_read_S16LE(BME280_REG_DIG_P2)
-        self.dig_P3 = self._i2c_read_S16LE(BME280_REG_DIG_P3)
-        self.dig_P4 = self._i2c_read_S16LE(BME280_REG_DIG_P4)
-        self.dig_P5 = self._i2c_read_S16LE(BME280_REG_DIG_P5)
-        self.dig_P6 = self._i2c_read_S16LE(BME280_REG_DIG_P6)
-        self.dig_P7 = self._i2c_read_S16LE(BME280_REG_DIG_P7)
-        self.dig_P8 = self._i2c_read_S16LE(BME280_REG_DIG_P8)
-        self.dig_P9 = self._i2c_read_S16LE(BME280_REG_DIG_P9)
-        # humidity
-        self.dig_H1 = self._i2c_read_U8(BME280_REG_DIG_H1)
-        self.dig_H2 = self._i2c_read_S16LE(BME280_REG_DIG_H2)
-        self.dig_H3 = self._i2c_read_U8(BME280_REG_DIG_H3)
-        self.dig_H6 = self._i2c_read_S8(BME280_REG_DIG_H7)
-        self.dig_H4 = (self._i2c_read_S8(BME280_REG_DIG_H4)<<4) | (self._i2c_read_U8(BME280_REG_DIG_H5) & 0x0F)
-        self.dig_H5 = (self._i2c_read_S8(BME280_REG_DIG_H6)<<4) | (self._i2c_read_U8(BME280_REG_DIG_H5)>>4 & 0x0F)
+        # Read both calibration blocks at once
+        with self.__lock:
+            cal1 = bytes(self.__bus.read_i2c_block_data(self.__i2c_address, BME280_REG_DIG_T1, BME280_CALIB_T_P_LEN))
+            cal2 = bytes(self.__bus.read_i2c_block_data(self.__i2c_address, BME280_REG_DIG_H2, BME280_CALIB_H_LEN))
+        # temperature and pressure (0x88 ... 0x9F)
+        (self.dig_T1, self.dig_T2, self.dig_T3,
+         self.dig_P1, self.dig_P2, self.dig_P3, self.dig_P4, self.dig_P5,
+         self.dig_P6, self.dig_P7, self.dig_P8, self.dig_P9) = struct.unpack_from('<HhhHhhhhhhhh', cal1, 0)
+        # humidity (0xA1 and 0xE1 ... 0xE7)
+        self.dig_H1 = cal1[BME280_REG_DIG_H1 - BME280_REG_DIG_T1]
+        self.dig_H2, self.dig_H3, h4_msb, h45_lsb, h5_msb, self.dig_H6 = struct.unpack_from('<hBbBbb', cal2, 0)
+        # dig_H4 and dig_H5 are 12-bit values sharing the nibbles of 0xE5
+        self.dig_H4 = (h4_msb << 4) | (h45_lsb & 0x0F)
+        self.dig_H5 = (h5_msb << 4) | (h45_lsb >> 4)
+        # Calibration values packed in argument order of the compensation functions
+        self._cal_T = (self.dig_T1, self.dig_T2, self.dig_T3)
+        self._cal_P = (self.dig_P1, self.dig_P2, self.dig_P3, self.dig_P4, self.dig_P5,
+                       self.dig_P6, self.dig_P7, self.dig_P8, self.dig_P9)
+        self._cal_H = (self.dig_H1, self.dig_H2, self.dig_H3, self.dig_H4, self.dig_H5, self.dig_H6)
+
+
+    ###
+    # Calculate the maximum conversion time of the current oversampling settings (see datasheet 9.1).
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Maximum conversion time [ms].
+    def _conversion_time(self):
+        osrs_t, osrs_p, osrs_h = self.__osrs
+        t_conv = 1.25 + 2.3 * osrs_t
+        if osrs_p:
+            t_conv += 2.3 * osrs_p + 0.575
+        if osrs_h:
+            t_conv += 2.3 * osrs_h + 0.575
+        return t_conv
 
 
     ###
@@ -509,21 +725,50 @@ class BME280(object):
     # @param[in]    timeout         Timeout for waiting [ms].
     # @return       True in case of success; otherwise False.
     def wait_for_ready(self, timeout=500):
-        # Time-passed counter
-        passed = 0
-        # Wait for conversion to complete
-        while(self._i2c_read_U8(BME280_REG_STATUS) & 0x08):
+        # Check if a conversion is running at all
+        if not (self._i2c_read_U8(BME280_REG_STATUS) & BME280_STATUS_MEASURING):
+            return True
+        deadline = time.monotonic() + (timeout / 1000.0)
+        # Wait for the expected conversion time once
+        time.sleep(min(self.__t_conv, timeout) / 1000.0)
+        # Poll until the conversion is complete
+        while(self._i2c_read_U8(BME280_REG_STATUS) & BME280_STATUS_MEASURING):
             # check if timeout has already been reached
-            if passed >= timeout:
+            if time.monotonic() >= deadline:
                 # Timeout
                 return False
-            # Wait for 5ms
-            time.sleep(0.005)
-            # increment timeout counter by 5ms
-            passed += 5
+            time.sleep(BME280_POLL_INTERVAL)
         return True
 
 
+    ###
+    # Read all raw (uncompensated) values with a single burst read (0xF7...0xFE).
+    # A burst read is also required for consistent data (shadowing, see datasheet 4).
+    # Samples younger than BME280_RAW_CACHE_TTL are reused without bus access.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    timeout         Timeout for waiting [ms].
+    # @return       Tuple of raw (temperature, pressure, humidity) in case of success; otherwise False.
+    def _read_all_raw(self, timeout=500):
+        # Check if the last sample is still recent enough
+        now = time.monotonic()
+        if (self.__raw is not None) and ((now - self.__raw_time) < BME280_RAW_CACHE_TTL):
+            return self.__raw
+        # Check if the sensor readings are ready (in normal mode, the data registers are
+        # continuously updated and shadowed, so only the first conversion has to be awaited)
+        if self.__wait_ready:
+            if self.wait_for_ready(timeout) is False:
+                return False
+            self.__wait_ready = (self.__mode != BME280_MODE_NORMAL)
+        # Read all data bytes at once
+        with self.__lock:
+            data = self.__bus.read_i2c_block_data(self.__i2c_address, BME280_REG_P_MSB, BME280_RAW_LEN)
+        # Decode, store and return the raw values
+        self.__raw = _bme280_decode_raw(data)
+        self.__raw_time = now
+        return self.__raw
+
+
     ###
     # Read the raw (uncompensated) temperature value.
     #
@@ -531,18 +776,12 @@ class BME280(object):
     # @param[in]    timeout         Timeout for waiting [ms].
     # @return       Raw temperature value in case of success; otherwise False.
     def _get_raw_temperature(self, timeout=500):
-        # Check if the sensor readings are ready
-        if self.wait_for_ready(timeout) is False:
-            return False
-        # Read the temperature bytes
-        msb = self._i2c_read_U8(BME280_REG_T_MSB)
-        lsb = self._i2c_read_U8(BME280_REG_T_LSB)
-        xlsb = self._i2c_read_U8(BME280_REG_T_XLSB)
-        # Check return values
-        if (msb is False) or (lsb is False) or (xlsb is False):
+        raw = self._read_all_raw(timeout)
+        # Check return value
+        if raw is False:
             return False
         # Return the raw temperature value
-        return (((msb << 16) | (lsb << 8) | xlsb) >> 4)
+        return raw[0]
 
     ###
     # Read the raw (uncompensated) pressure value.
@@ -551,18 +790,12 @@ class BME280(object):
     # @param[in]    timeout         Timeout for waiting [ms].
     # @return       Raw pressure value in case of success; otherwise False.
     def _get_raw_pressure(self, timeout=500):
-        # Check if the sensor readings are ready
-        if self.wait_for_ready(timeout) is False:
-            return False
-        # Read the pressure bytes
-        msb = self._i2c_read_U8(BME280_REG_P_MSB)
-        lsb = self._i2c_read_U8(BME280_REG_P_LSB)
-        xlsb = self._i2c_read_U8(BME280_REG_P_XLSB)
-        # Check return values
-        if (msb is False) or (lsb is False) or (xlsb is False):
+        raw = self._read_all_raw(timeout)
+        # Check return value
+        if raw is False:
             return False
         # Return the raw pressure value
-        return (((msb << 16) | (lsb << 8) | xlsb) >> 4)
+        return raw[1]
 
 
     ###
@@ -572,17 +805,12 @@ class BME280(object):
     # @param[in]    timeout         Timeout for waiting [ms].
     # @return       Raw humidity value in case of success; otherwise False.
     def _get_raw_humidity(self, timeout=500):
-        # Check if the sensor readings are ready
-        if self.wait_for_ready(timeout) is False:
-            return False
-        # Read the humidity bytes
-        msb = self._i2c_read_U8(BME280_REG_H_MSB)
-        lsb = self._i2c_read_U8(BME280_REG_H_LSB)
-        # Check return values
-        if (msb is False) or (lsb is False):
+        raw = self._read_all_raw(timeout)
+        # Check return value
+        if raw is False:
             return False
         # Return the raw humidity value
-        return ((msb << 8) | lsb)
+        return raw[2]
 
 
     ###
@@ -596,11 +824,8 @@ class BME280(object):
         # Check return value
         if raw is False:
             return False
-        # Calculate the compensated temperature value (see datasheet 8.2)
-        var1 = ((((raw>>3) - (self.dig_T1<<1))) * (self.dig_T2)) >> 11
-        var2 = (((((raw>>4) - (self.dig_T1)) * ((raw>>4) - (self.dig_T1))) >> 12) * (self.dig_T3)) >> 14
         # Calculate the fine resolution temperature value
-        self.__t_fine = var1 + var2
+        self.__t_fine = _bme280_t_fine(raw, *self._cal_T)
         # Calculate and return the compensated value
         return ((self.__t_fine * 5 + 128) >> 8) / 100.0
 
@@ -611,34 +836,15 @@ class BME280(object):
     # @param[in]    self            The object pointer.
     # @return       Pressure value [hPa] in case of success; otherwise False.
     def read_pressure(self):
-        # Get the raw temperature reading
-        raw = self._get_raw_pressure()
+        # Get all raw readings (same sample as the temperature)
+        raw = self._read_all_raw()
         # Check return value
         if raw is False:
             return False
-        # Check if the fine resolution temperature value is not set yet
-        if (self.__t_fine==0.0):
-            # Perform temperature measurement to update the __t_fine value
-            self.get_temperature()
-        # Calculate the compensated pressure value (see datasheet 8.2)
-        var1 = ((self.__t_fine)>>1) - 64000
-        var2 = (((var1>>2) * (var1>>2)) >> 11 ) * (self.dig_P6)
-        var2 = var2 + ((var1*(self.dig_P5))<<1)
-        var2 = (var2>>2) + ((self.dig_P4)<<16)
-        var1 = (((self.dig_P3 * (((var1>>2) * (var1>>2)) >> 13 )) >> 3) + (((self.dig_P2) * var1) >> 1)) >> 18
-        var1 = ((((32768+var1)) * (self.dig_P1)) >> 15)
-        # Avoid division by zero
-        if var1==0:
-            return False 
-        p = (((1048576-raw) - (var2>>12))) * 3125
-        if p<0x80000000:
-            p = int((p << 1) / var1)
-        else:
-            p = int((p / var1) * 2)
-        var1 = ((self.dig_P9) * (((p>>3) * (p>>3))>>13))>>12
-        var2 = ((p>>2) * self.dig_P8)>>13
-        # Return the resulting pressure in hPa
-        return (p + ((var1 + var2 + self.dig_P7) >> 4)) / 100.0
+        # Update the fine resolution temperature value
+        self.__t_fine = _bme280_t_fine(raw[0], *self._cal_T)
+        # Calculate and return the compensated pressure value [hPa]
+        return _bme280_pressure(raw[1], self.__t_fine, *self._cal_P)
 
 
     ###
@@ -647,26 +853,15 @@ class BME280(object):
     # @param[in]    self            The object pointer.
     # @return       Humidity value [% RH] in case of success; otherwise False.
     def read_humidity(self):
-        # Get the raw humidity reading
-        raw = self._get_raw_humidity()
+        # Get all raw readings (same sample as the temperature)
+        raw = self._read_all_raw()
         # Check return value
         if raw is False:
             return False
-        # Check if the fine resolution temperature value is not set yet
-        if (self.__t_fine==0.0):
-            # Perform temperature measurement to update the __t_fine value
-            self.get_temperature()
-        # Calculate the compensated humidity value (see datasheet)
-        humidity = float(self.__t_fine) - 76800.0
-        humidity = (float(raw) - (float(self.dig_H4) * 64.0 + float(self.dig_H5) / 16384.0 * humidity)) * (float(self.dig_H2) / 65536.0 * (1.0 + float(self.dig_H6) / 67108864.0 * humidity * (1.0 + float(self.dig_H3) / 67108864.0 * humidity)))
-        humidity = humidity * (1.0 - float(self.dig_H1) * humidity / 524288.0)
-        # Limit the value
-        if humidity > 100:
-            humidity = 100
-        elif humidity < 0:
-            humidity = 0
-        # Return the resulting value
-        return humidity
+        # Update the fine resolution temperature value
+        self.__t_fine = _bme280_t_fine(raw[0], *self._cal_T)
+        # Calculate and return the compensated humidity value [% RH]
+        return _bme280_humidity(raw[2], self.__t_fine, *self._cal_H)
 
 
     ###
@@ -675,12 +870,72 @@ class BME280(object):
     # @param[in]    self            The object pointer.
     # @return       Dewpoint value [°C] in case of success; otherwise False.
     def read_dewpoint(self):
-        # Read temperature value
-        celsius = self.get_temperature()
-        # Read humidity value
-        humidity = self.get_humidity()
+        # Read all values at once
+        values = self.read_all()
         # Check return value
-        if (celsius is False) or (humidity is False):
+        if values is False:
             return False
+        celsius, _, humidity = values
         # Return the dew-point
         return (celsius - ((100 - humidity) / 5))
+
+
+    ###
+    # Read the compensated temperature, pressure and humidity values of the same sample.
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Tuple of (temperature [°C], pressure [hPa], humidity [% RH]) in case of success; otherwise False.
+    def read_all(self):
+        # Get all raw readings with a single burst read
+        raw = self._read_all_raw()
+        # Check return value
+        if raw is False:
+            return False
+        # Calculate the fine resolution temperature value (shared by all values)
+        t_fine = _bme280_t_fine(raw[0], *self._cal_T)
+        self.__t_fine = t_fine
+        # Calculate and return the compensated values
+        return (((t_fine * 5 + 128) >> 8) / 100.0,
+                _bme280_pressure(raw[1], t_fine, *self._cal_P),
+                _bme280_humidity(raw[2], t_fine, *self._cal_H))
+
+
+    ###
+    # Read a batch of samples and compensate them at once (vectorized with numpy).
+    # In normal mode, the period is at least one measurement cycle (conversion plus standby
+    # time); in forced mode, a new conversion is triggered for every sample.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    n               Number of samples.
+    # @param[in]    period_ms       Time between two samples [ms] (default: 0, i.e., as fast as possible).
+    # @param[in]    timeout         Timeout for waiting per sample [ms].
+    # @return       Tuple of numpy arrays (temperature [°C], pressure [hPa], humidity [% RH]) in case of success; otherwise False.
+    def read_batch(self, n, period_ms=0, timeout=500):
+        # numpy (only needed for batched reads)
+        import numpy as np
+        # In normal mode, the data registers are only updated once per measurement cycle
+        forced = (self.__mode == BME280_MODE_FORCED)
+        if self.__mode == BME280_MODE_NORMAL:
+            period_ms = max(period_ms, self.__t_conv + self.__t_sb)
+        raw = np.empty((n, 3), dtype=np.int64)
+        # Collect the raw samples (one burst read each)
+        for i in range(n):
+            # Trigger a new conversion (forced mode returns to sleep after each one)
+            if forced and (self.set_mode(BME280_MODE_FORCED) is False):
+                return False
+            # Check if the sensor readings are ready
+            if self.wait_for_ready(timeout) is False:
+                return False
+            with self.__lock:
+                data = self.__bus.read_i2c_block_data(self.__i2c_address, BME280_REG_P_MSB, BME280_RAW_LEN)
+            raw[i] = _bme280_decode_raw(data)
+            if period_ms and (i < n-1):
+                time.sleep(period_ms / 1000.0)
+        # Compensate all samples at once
+        t_fine, temperature, pressure, humidity = _bme280_compensate_batch(raw, self._cal_T, self._cal_P, self._cal_H)
+        # Keep the fine resolution temperature value of the latest sample
+        if n > 0:
+            self.__t_fine = int(t_fine[-1])
+        # Return the resulting values
+        return (temperature, pressure, humidity)
+
@@ -14,6 +14,8 @@
 #
 # @example  ds18 = DS18B20('/sys/bus/w1/devices/28-011927fdb603/w1_slave')
 # @example  temp = ds18.read_temperature()    # Read the current temperature [°C]
+# @example  ds18.close()                      # Close the sensor file handle
+# @example  DS18B20_trigger_all()             # Start a conversion on all sensors at once (then read each sensor)
 #
 # @todo     Either specify path or search for sensor under "/sys/bus/w1/devices/"
 #####
@@ -22,11 +24,40 @@
 ##### LIBRARIES #####
 # time (for sleep method)
 import time
+# os (for low-level file access)
+import os
 
 
 ##### GLOBAL VARIABLES #####
 # Maximum number of read attempts
 MAX_ATTEMPTS = 10
+# Maximum number of bytes read from the sensor file (two lines of ~40 bytes)
+DS18B20_READ_LEN = 128
+# Bulk read sysfs entry of the w1_therm driver (triggers all sensors on the bus at once)
+DS18B20_BULK_READ = '/sys/bus/w1/devices/w1_bus_master1/therm_bulk_read'
+# Conversion time at 12-bit resolution [s]
+DS18B20_CONV_TIME = 0.75
+
+
+###
+# Start a temperature conversion on all sensors of a 1-wire bus at once.
+# Subsequent reads of the sensors return the converted values without starting a new
+# conversion each, i.e., N sensors take one conversion time instead of N.
+#
+# @param[in] path Path to the bus master's therm_bulk_read entry.
+# @param[in] wait Wait for the conversion to complete (default: True).
+# @param[out] True in case of success; otherwise False.
+#
+# @note Requires a kernel with bulk read support in w1_therm (>= 5.10).
+def DS18B20_trigger_all(path=DS18B20_BULK_READ, wait=True):
+    try:
+        with open(path, 'w') as bulk:
+            bulk.write('trigger\n')
+    except:
+        return False
+    if wait:
+        time.sleep(DS18B20_CONV_TIME)
+    return True
 
 
 #####
@@ -44,24 +75,60 @@ class DS18B20(object):
         # @var __path
         # Objects own sensor path
         self.__path = path
+        # @var __fd
+        # Objects own sensor file descriptor (opened on first read)
+        self.__fd = None
+
+
+    ###
+    # The destructor.
+    #
+    # @param[in] self The object pointer.
+    def __del__(self):
+        self.close()
+
+
+    ###
+    # Close the sensor file handle (re-opened on the next read).
+    #
+    # @param[in] self The object pointer.
+    def close(self):
+        if self.__fd is not None:
+            try:
+                os.close(self.__fd)
+            except:
+                pass
+            self.__fd = None
 
 
     ###
     # Read the raw sensor data from the file.
     #
     # @param[in] self The object pointer.
-    # @param[out] Raw sensor value in case of success; otherwise False.
+    # @param[out] Raw sensor data (bytes) in case of success; otherwise False.
     def __read_raw(self) :
-        # Open given system bus address
-        data = False
         try:
-            sens = open(self.__path, 'r')
-            data = sens.readlines()
-            sens.close()
+            # Open the file only once and re-read it from the start (sysfs re-generates the content)
+            if self.__fd is None:
+                self.__fd = os.open(self.__path, os.O_RDONLY)
+            return os.pread(self.__fd, DS18B20_READ_LEN, 0)
         except:
+            self.close()
+            return False
+
+
+    ###
+    # Check if the raw sensor data is valid (CRC ok and not all zero).
+    #
+    # @param[in] self The object pointer.
+    # @param[in] data Raw sensor data (bytes).
+    # @param[out] True if valid; otherwise False.
+    def __is_valid(self, data):
+        if not data:
             return False
-        else:
-            return data
+        # First line: "xx xx xx xx xx xx xx xx xx : crc=xx YES"
+        eol = data.find(b'\n')
+        return data.endswith(b'YES', 0, eol) and not data.startswith(b'00 00 00 00 00 00 00 00 00')
 
 
     ###
@@ -71,18 +138,18 @@ class DS18B20(object):
     # @param[out] Temperature value (°C) in case of success; otherwise False.
     def read_temperature(self):
         data = self.__read_raw()
-        if data:
-            # Check if sensor is ready
-            attempts = 0
-            while ((len(data) < 1) or (data[0].strip()[-3:] != "YES") or ("00 00 00 00 00 00 00 00 00" in data[0])):
-                time.sleep(0.25)
-                data = self.__read_raw()
-                attempts = attempts + 1
-                if attempts >= MAX_ATTEMPTS:
-                    return False
-            # Check for temperature reading suffix
-            equals_pos = data[1].find('t=')
-            if equals_pos != -1:
-                return (float(data[1][equals_pos+2:]) / 1000.0)
-        else:
+        if data is False:
+            return False
+        # Check if sensor is ready
+        attempts = 0
+        while not self.__is_valid(data):
+            time.sleep(0.25)
+            data = self.__read_raw()
+            attempts = attempts + 1
+            if attempts >= MAX_ATTEMPTS:
+                return False
+        # Check for temperature reading suffix
+        equals_pos = data.find(b't=')
+        if equals_pos == -1:
             return False
+        return (float(data[equals_pos+2:].strip()) / 1000.0)
@@ -12,17 +12,18 @@
 #
 # @example  jt = JT103(0)                 # Get an instance at ADC channel 0
 # @example  temp = jt.read_temperature()  # Read the current temperature [°C]
+# @example  temps = raw_to_degree_batch(samples)  # Convert logged raw ADC values [°C]
+# @example  precompute_table()            # Build the conversion table (optional; ~32k entries)
 #####
 
 
 ##### LIBRARIES #####
 # Import log function from math
 from math import log
-# Add path to the ETB core modules
-import sys
-sys.path.insert(1, '../core/')
-# Import the ADS1115 module
-from ETB.core.ADS1115 import *
+# array (for the conversion table)
+from array import array
+# Import required (local) modules
+from ETB.core.ADS1115 import ADS1115
 
 
 ##### GLOBAL VARIABLES #####
@@ -39,6 +40,38 @@ JT103_MAX_ADC           = 32767
 JT103_GAIN_MAX          = 4.096
 JT103_VSS_MAX           = 5.22      # RPi gives ~5.22V instead of 5V
 JT103_MAX_ADC_CORRECT   = JT103_MAX_ADC * (JT103_VSS_MAX / JT103_GAIN_MAX)
+## precomputed constants of the beta equation
+JT103_BETA_T_ROOM       = JT103_BETA * JT103_TEMP_ROOM
+JT103_LN_R_ROOM         = log(JT103_R_ROOM)
+## conversion table (raw ADC value -> °C; None until built by precompute_table)
+JT103_TABLE             = None
+
+
+###
+# Calculate the temperature in degrees Celsius (°C) of an ADC reading with the beta equation
+#
+# @param[in]    raw             Raw ADC value.
+# @param[out]   Temperature value [°C].
+def _raw_to_degree_calc(raw):
+    # Calculate the thermistor's resistance
+    R_thermistor = JT103_R_BALANCE / ((JT103_MAX_ADC_CORRECT / raw) - 1.0)
+    # Use the beta equation to get the temperature
+    T_thermistor = (JT103_BETA_T_ROOM / (JT103_BETA + (JT103_TEMP_ROOM * (log(R_thermistor) - JT103_LN_R_ROOM)))) - JT103_TEMP_K2C
+    # Return the temperature (in degree Celsius)
+    return round(T_thermistor,3)
+
+
+###
+# Build the conversion table (index: raw ADC value 1..JT103_MAX_ADC).
+# Building takes a while (one beta equation per ADC value), so it is never done
+# implicitly; call it once at start-up if many readings are to be converted.
+#
+# @param[out]   Conversion table [°C] (array of doubles).
+def precompute_table():
+    global JT103_TABLE
+    if JT103_TABLE is None:
+        JT103_TABLE = array('d', [0.0] + [_raw_to_degree_calc(r) for r in range(1, JT103_MAX_ADC+1)])
+    return JT103_TABLE
 
 
 ###
@@ -47,13 +80,35 @@ JT103_MAX_ADC_CORRECT   = JT103_MAX_ADC * (JT103_VSS_MAX / JT103_GAIN_MAX)
 # @param[in]    self            The object pointer.
 # @param[in]    raw             Raw ADC value.
 # @param[out]   Temperature value [°C] in case of success; otherwise False.
+#
+# @note     Positive integer readings are looked up if the table was built (see precompute_table).
 def raw_to_degree(raw):
-    # Calculate the thermistor's resistance
-    R_thermistor = JT103_R_BALANCE / ((JT103_MAX_ADC_CORRECT / float(raw)) - 1.0)
-    # Use the beta equation to get the temperature
-    T_thermistor = ((JT103_BETA * JT103_TEMP_ROOM) / (JT103_BETA + (JT103_TEMP_ROOM * log(R_thermistor/JT103_R_ROOM)))) - JT103_TEMP_K2C
-    # Return the temperature (in degree Celsius)
-    return round(float(T_thermistor),3)
+    # Valid ADC readings are looked up (exact values, no interpolation)
+    if (JT103_TABLE is not None) and (type(raw) is int) and (0 < raw <= JT103_MAX_ADC):
+        return JT103_TABLE[raw]
+    # Other values are calculated
+    return _raw_to_degree_calc(raw)
+
+
+###
+# Convert an array of ADC readings to temperatures in degrees Celsius (°C) at once.
+#
+# @param[in]    raw             Raw ADC values (array-like).
+# @param[out]   Temperature values [°C] (numpy array).
+def raw_to_degree_batch(raw):
+    # numpy (only needed for batch conversions)
+    import numpy as np
+    raw = np.asarray(raw)
+    # Integer readings within the valid ADC range are looked up (if the table was built)
+    if (JT103_TABLE is not None) and (raw.dtype.kind in 'iu') and (raw.size > 0) and (raw.min() > 0) and (raw.max() <= JT103_MAX_ADC):
+        return np.frombuffer(JT103_TABLE, dtype=np.float64)[raw]
+    raw = raw.astype(np.float64)
+    # Calculate the thermistors' resistances
+    R_thermistor = JT103_R_BALANCE / ((JT103_MAX_ADC_CORRECT / raw) - 1.0)
+    # Use the beta equation to get the temperatures
+    T_thermistor = (JT103_BETA_T_ROOM / (JT103_BETA + (JT103_TEMP_ROOM * (np.log(R_thermistor) - JT103_LN_R_ROOM)))) - JT103_TEMP_K2C
+    # Return the temperatures (in degree Celsius)
+    return np.round(T_thermistor, 3)
 
 
 #####
@@ -73,9 +128,6 @@ class JT103(object):
         # @var __i2c_address
         # Object's ADC I2C address
         self.__i2c_address = address
-        # @var __bus
-        # Object's ADC I2C bus number
-        self.__bus = smbus.SMBus(busnum)
         # @var __channel
         # Object's ADC input channel
         self.__channel = channel
@@ -12,12 +12,15 @@
 #
 # @example  lm75 = LM75()                  # Get an instance with default I2C address (0x48)
 # @example  temp = lm75.read_temperature() # Read the current temperature [°C]
+# @example  (temp,hyst,os,conf) = lm75.read_all() # Read all temperatures and the configuration
 #####
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
+# struct (for unpacking register data)
+import struct
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_get_bus
 
 
 ##### GLOBAL VARIABLES #####
@@ -26,6 +29,9 @@ LM75_REG_TEMP           = 0x00
 LM75_REG_CONF           = 0x01
 LM75_REG_HYST           = 0x02
 LM75_REG_OS             = 0x03
+### Temperature ###
+# Temperature registers hold degree Celsius as signed 8.8 fixed point
+LM75_TEMP_SCALE         = 1.0 / 256.0
 ### Configuration ###
 # Shutdown
 LM75_CONF_SHDN_OFFSET   = 0
@@ -42,6 +48,15 @@ LM75_CONF_QUEUE = {
     4:  0x02,
     6:  0x03
 }
+# Flags (SHUTDOWN,COMP,POL,QUEUE) of every configuration register value
+LM75_CONF_FLAGS = tuple(
+    (
+        (conf >> LM75_CONF_SHDN_OFFSET) & 1,
+        (conf >> LM75_CONF_COMP_OFFSET) & 1,
+        (conf >> LM75_CONF_POL_OFFSET) & 1,
+        (conf & LM75_CONF_QUEUE_MASK) >> LM75_CONF_QUEUE_OFFSET
+    ) for conf in range(256)
+)
 
 
 #####
@@ -61,8 +76,11 @@ class LM75(object):
         # Objects own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Objects own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Objects I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
+        # @var __config
+        # Cached configuration register value (None until read or written)
+        self.__config = None
 
 
     ###
@@ -73,7 +91,8 @@ class LM75(object):
     # @param[out] Unsigned byte value in case of success; otherwise False.
     def _i2c_read_U8(self, register):
         # Read value from the specified register
-        return (self.__bus.read_byte_data(self.__i2c_address, register) & 0xFF)
+        with self.__lock:
+            return (self.__bus.read_byte_data(self.__i2c_address, register) & 0xFF)
 
 
     ###
@@ -85,7 +104,8 @@ class LM75(object):
     # @param[out] Unsigned word value in case of success; otherwise False.
     def _i2c_read_U16(self, register, little_endian=True):
         # Read word value from the I2C register
-        result = self.__bus.read_word_data(self.__i2c_address,register) & 0xFFFF
+        with self.__lock:
+            result = self.__bus.read_word_data(self.__i2c_address,register) & 0xFFFF
         # Swap bytes if using big endian
         if little_endian is False:
             result = ((result << 8) & 0xFF00) + (result >> 8)
@@ -100,12 +120,10 @@ class LM75(object):
     # @param[in] little_endian Endianess of the value (true if little)
     # @param[out] Signed word value in case of success; otherwise False.
     def _i2c_read_S16(self, register, little_endian=True):
-        # First, read the value as unsigned word
-        result = self._i2c_read_U16(register, little_endian)
-        # Check for sign bit and turn into a negative value if set.
-        if result & 0x8000 != 0:
-            result -= 1 << 16
-        return result
+        # Read both bytes with a single block read
+        with self.__lock:
+            data = bytes(self.__bus.read_i2c_block_data(self.__i2c_address, register, 2))
+        return struct.unpack('<h' if little_endian else '>h', data)[0]
 
 
     ###
@@ -127,7 +145,8 @@ class LM75(object):
     # @param[out] True in case of success; otherwise False.
     def _i2c_write_8(self, register, value):
         # Write the given value to the specified register
-        self.__bus.write_byte_data(self.__i2c_address, register, (value&0xFF))
+        with self.__lock:
+            self.__bus.write_byte_data(self.__i2c_address, register, (value&0xFF))
 
 
     ###
@@ -143,7 +162,8 @@ class LM75(object):
         if little_endian is False:
             value = ((value << 8) & 0xFF00) + (value >> 8)
         # Write the given value to the specified register
-        self.__bus.write_word_data(self.__i2c_address, register, value)
+        with self.__lock:
+            self.__bus.write_word_data(self.__i2c_address, register, value)
 
 
     ###
@@ -158,12 +178,15 @@ class LM75(object):
 
 
     ###
-    # Read the configuration register.
+    # Read the configuration register (cached after the first read or write).
     #
     # @param[in] self The object pointer.
+    # @param[in] cached Return the cached value if available (default: True).
     # @param[out] Configuration register value in case of success; otherwise False.
-    def get_config(self):
-        return self._i2c_read_U8(LM75_REG_CONF)
+    def get_config(self, cached=True):
+        if (self.__config is None) or (not cached):
+            self.__config = self._i2c_read_U8(LM75_REG_CONF)
+        return self.__config
 
 
     ###
@@ -176,13 +199,8 @@ class LM75(object):
         ret = self.get_config()
         if ret is False:
             return False
-        # Extract the single flags
-        SHUTDOWN = 1 if(ret & (1 << LM75_CONF_SHDN_OFFSET)) else 0
-        COMP     = 1 if(ret & (1 << LM75_CONF_COMP_OFFSET)) else 0
-        POL      = 1 if(ret & (1 << LM75_CONF_POL_OFFSET)) else 0
-        QUEUE    = (ret & LM75_CONF_QUEUE_MASK) >> LM75_CONF_QUEUE_OFFSET
-        # Return the flag values
-        return (SHUTDOWN,COMP,POL,QUEUE)
+        # Return the flag values (looked up)
+        return LM75_CONF_FLAGS[ret]
 
 
     ###
@@ -195,7 +213,7 @@ class LM75(object):
         # Read the temperature register value as signed integer (big endian)
         raw = self._i2c_read_S16BE(register)
         # Convert word to float
-        return (float(raw>>4)/16.0)
+        return (raw * LM75_TEMP_SCALE)
 
 
     ###
@@ -225,6 +243,18 @@ class LM75(object):
         return self._get_raw_temperature(LM75_REG_OS)
 
 
+    ###
+    # Read all temperature values and the configuration register.
+    #
+    # @param[in] self The object pointer.
+    # @param[out] Tuple of (temperature, hysteresis temperature, overtemperature shutdown temperature, configuration) in case of success; otherwise False.
+    #
+    # @note The LM75 has no register auto-increment, i.e., every register needs its own read;
+    #       the configuration is taken from the cache.
+    def read_all(self):
+        return (self.read_temperature(), self.read_temperature_hyst(), self.read_temperature_os(), self.get_config())
+
+
     ###
     # Set the configuration register.
     #
@@ -232,7 +262,10 @@ class LM75(object):
     # @param[in] value Configuration register value.
     # @param[out] True in case of success; otherwise False.
     def set_config(self,value):
-        return self._i2c_write_8(LM75_REG_CONF, value)
+        ret = self._i2c_write_8(LM75_REG_CONF, value)
+        # Update the cached value
+        self.__config = value & 0xFF
+        return ret
 
 
     ###
@@ -269,7 +302,7 @@ class LM75(object):
     # @param[out] True in case of success; otherwise False.
     def _set_temperature(self, value, register):
         # @todo: Convert float to word (not working yet!?)
-        word = int(value * 256.0)
+        word = int(round(value * 256.0)) & 0xFFFF
         # Write the given value to the register
         return self._i2c_write_16BE(register, word)
 
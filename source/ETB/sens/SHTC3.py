@@ -15,24 +15,39 @@
 # @example  temp = shtc3.read_temperature() # Read the current temperature [°C]
 # @example  humi = shtc3.read_humidity()    # Read the current relative humidity [%]
 # @example  (temp,humi) = shtc3.read_temperature_humidity()    # Read both
+# @example  valid = shtc3.check_crc_batch(words, crcs) # Check the CRCs of logged words (numpy arrays)
+# @example  (temps,humis,valid) = shtc3.decode_batch(raw) # Decode logged 6-byte measurements (numpy arrays)
 #####
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
 # time (for sleep method)
 import time
+# os (for plain I2C reads)
+import os
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_open_raw, I2C_get_bus
 
 
 ##### GLOBAL VARIABLES #####
 ### Sensor specific ###
 # Delay after requesting the sensor to wake-up [ms] #
 SHTC3_WAKEUP_DELAY                      = 1
-# Delay for measurement poling [ms] #
+# Maximum time to wait for a measurement (timeout) [ms] #
 SHTC3_POLLING_DELAY                     = 50
+# Typical measurement duration in normal mode (max. 12.1ms) [ms] #
+SHTC3_MEAS_TIME_NORM                    = 10.8
+# Typical measurement duration in low-power mode (max. 0.8ms) [ms] #
+SHTC3_MEAS_TIME_LPOW                    = 0.7
+# Interval for polling the measurement result [ms] #
+SHTC3_POLLING_INTERVAL                  = 1
 # CRC polynomial: P(x) = x^8 + x^5 + x^4 + 1 = 100110001 #
 SHTC3_CRC_POLYNOMIAL                    = 0x131
+# Conversion factors of the raw readings (175 / 2^16 and 100 / 2^16) #
+SHTC3_T_SCALE                           = 175.0 / 65536.0
+SHTC3_H_SCALE                           = 100.0 / 65536.0
+# Maximum age of a measurement shared by the read functions [s] #
+SHTC3_MAX_AGE                           = 0.1
 
 ### Measurement setting ###
 # Measure RH before T (default: 0) #
@@ -77,6 +92,36 @@ if SHTC3_RH_FIRST:
     SHTC3_COM_MEAS_NORM                 = SHTC3_COM_MEAS_RHT_POL_NORM
 else:
     SHTC3_COM_MEAS_NORM                 = SHTC3_COM_MEAS_TRH_POL_NORM
+# Low-power mode with clock stretching #
+if SHTC3_RH_FIRST:
+    SHTC3_COM_MEAS_LPOW_CST             = SHTC3_COM_MEAS_RHT_CST_LPOW
+else:
+    SHTC3_COM_MEAS_LPOW_CST             = SHTC3_COM_MEAS_TRH_CST_LPOW
+# Normal mode with clock stretching #
+if SHTC3_RH_FIRST:
+    SHTC3_COM_MEAS_NORM_CST             = SHTC3_COM_MEAS_RHT_CST_NORM
+else:
+    SHTC3_COM_MEAS_NORM_CST             = SHTC3_COM_MEAS_TRH_CST_NORM
+
+
+### CRC lookup table ###
+###
+# Calculate the CRC of a single byte (bit-serial, initial value 0).
+#
+# @param    byte        Input byte
+# @return   CRC of the byte
+###
+def _shtc3_crc8(byte):
+    crc = byte
+    for _ in range(8):
+        if crc & 0x80:
+            crc = (crc << 1) ^ SHTC3_CRC_POLYNOMIAL
+        else:
+            crc = crc << 1
+    return crc & 0xFF
+
+# CRC of each possible byte value (computed once at import) #
+SHTC3_CRC_TABLE                         = bytes(_shtc3_crc8(i) for i in range(256))
 
 
 #####
@@ -91,17 +136,88 @@ class SHTC3(object):
     # @param    self        The object pointer.
     # @param    address     Specific I2C address (default: 0x70)
     # @param    busnum      Specific I2C bus number (default: 1)
-    def __init__(self, address=0x70, busnum=1):
+    # @param    max_age     Maximum age of a reused measurement in seconds (default: SHTC3_MAX_AGE; 0 disables reuse)
+    #
+    # @note     Raises OSError if the I2C device file cannot be opened for plain reads.
+    def __init__(self, address=0x70, busnum=1, max_age=SHTC3_MAX_AGE):
         # @var __i2c_address
         # Object's own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Object's own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Object's I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
+        # @var __fd
+        # Object's own I2C device file (for plain reads without command byte)
+        self.__fd = I2C_open_raw(address, busnum)
+        # The plain reads cannot be done via SMBus (every SMBus read starts with a command byte)
+        if self.__fd is None:
+            raise OSError('Cannot open /dev/i2c-%d for plain reads from address 0x%02X' % (busnum, address))
+        # @var __buf
+        # Object's own receive buffer (reused by every read) and views of the read lengths
+        self.__buf = bytearray(6)
+        self.__views = {3: memoryview(self.__buf)[:3], 6: memoryview(self.__buf)}
+        # @var __max_age
+        # Maximum age of a reused measurement [s]
+        self.__max_age = max_age
+        # @var __last
+        # Last measurement (temperature, humidity) and its time (monotonic)
+        self.__last = None
+        self.__last_ts = 0.0
+        # @var __awake
+        # Sensor is known to be awake (unknown at start, i.e., wake-up is always sent)
+        self.__awake = False
         # Wake up the device in case it was sleeping
         self.sleep_disable()
 
 
+    ###
+    # Write a 16-bit command to the SHTC3 sensor (single I2C write of MSB and LSB).
+    #
+    # @param    self        The object pointer.
+    # @param    command     16-bit command
+    ###
+    def __write_command(self, command):
+        with self.__lock:
+            self.__bus.write_byte_data(self.__i2c_address, (command>>8), (command&0xFF))
+
+
+    ###
+    # Read the given number of bytes from the SHTC3 sensor with a single I2C transaction.
+    #
+    # @param    self        The object pointer.
+    # @param    length      Number of bytes to be read (3 or 6)
+    # @return   Receive buffer in case of success (valid until the next read); False otherwise
+    ###
+    def __read_raw(self, length):
+        try:
+            with self.__lock:
+                count = os.readv(self.__fd, [self.__views[length]])
+        except OSError:
+            return False
+        # Check the number of bytes read
+        if count != length:
+            return False
+        return self.__buf
+
+
+    ###
+    # Extract a 16-bit word (two data bytes and one checksum byte) and perform CRC check.
+    #
+    # @param    self        The object pointer.
+    # @param    data        Bytes read from the sensor
+    # @param    offset      Offset of the word in the data
+    # @return   16-bit value in case of success; False otherwise
+    ###
+    def __word_crc(self, data, offset):
+        msb = data[offset]
+        lsb = data[offset+1]
+        # Verify checksum (see check_crc)
+        if SHTC3_CRC_TABLE[SHTC3_CRC_TABLE[0xFF ^ msb] ^ lsb] != data[offset+2]:
+            return False
+        # Combine the two bytes and return the 16-bit value
+        return (msb << 8) | lsb
+
+
     ###
     # Read 16-bit from the SHTC3 sensor and perform CRC check.
     #
@@ -109,16 +225,11 @@ class SHTC3(object):
     # @return   16-bit value in case of success; False otherwise
     ###
     def read16_crc(self):
-        # Read two data bytes and one checksum byte
-        data = [0, 0]
-        data[0]  = self.__bus.read_byte(self.__i2c_address)
-        data[1]  = self.__bus.read_byte(self.__i2c_address)
-        checksum = self.__bus.read_byte(self.__i2c_address)
-        # Verify checksum
-        if self.check_crc(data, 2, checksum) is False:
+        # Read two data bytes and one checksum byte at once
+        data = self.__read_raw(3)
+        if data is False:
             return False
-        # Combine the two bytes and return the 16-bit value
-        return (data[0] << 8) | data[1]
+        return self.__word_crc(data, 0)
 
 
     ###
@@ -132,22 +243,58 @@ class SHTC3(object):
     ###
     def check_crc(self, data, cnt, checksum):
         # Calculated checksum initial value
-        crc = 0xFF;
-        # Calculate CRC with given polynomial
+        crc = 0xFF
+        # Calculate CRC with the lookup table (one lookup per byte)
+        table = SHTC3_CRC_TABLE
         for i in range(cnt):
-            crc ^= data[i]
-            for _ in range(8):
-                if crc & 0x80:
-                    crc = (crc << 1) ^ SHTC3_CRC_POLYNOMIAL
-                else:
-                    crc = crc << 1
-        # Take the bottom 8 bits
-        crc &= 0xFF
+            crc = table[crc ^ data[i]]
         # Verify checksum
-        if (crc != checksum):
-            return False
+        return (crc == checksum)
+
+
+    ###
+    # Perform CRC checks on a batch of words (vectorized with numpy).
+    #
+    # @param    self        The object pointer.
+    # @param    data        Input data (N x cnt array of bytes)
+    # @param    checksums   Received CRC checksums (N bytes)
+    # @return   Boolean array (True for each word with a valid checksum)
+    ###
+    def check_crc_batch(self, data, checksums):
+        # numpy (only needed for batch checks)
+        import numpy as np
+        table = np.frombuffer(SHTC3_CRC_TABLE, dtype=np.uint8)
+        data = np.asarray(data, dtype=np.uint8)
+        # Calculate the CRCs column by column (one table lookup per byte for all words)
+        crc = np.full(data.shape[0], 0xFF, dtype=np.uint8)
+        for col in range(data.shape[1]):
+            crc = table[crc ^ data[:, col]]
+        # Verify checksums
+        return (crc == np.asarray(checksums, dtype=np.uint8))
+
+
+    ###
+    # Decode a batch of logged measurements (vectorized with numpy).
+    #
+    # @param    self        The object pointer.
+    # @param    data        Raw measurement bytes (N x 6 array or flat array of N*6 bytes)
+    # @return   Tuple of numpy arrays (temperature [°C], humidity [%RH], valid (both CRCs correct))
+    ###
+    def decode_batch(self, data):
+        # numpy (only needed for batch decoding)
+        import numpy as np
+        data = np.asarray(data, dtype=np.uint8).reshape(-1, 6)
+        # Verify the checksums of both words
+        valid = self.check_crc_batch(data[:, 0:2], data[:, 2]) & self.check_crc_batch(data[:, 3:5], data[:, 5])
+        # Combine the bytes to the raw 16-bit values
+        first = (data[:, 0].astype(np.uint32) << 8) | data[:, 1]
+        second = (data[:, 3].astype(np.uint32) << 8) | data[:, 4]
+        if SHTC3_RH_FIRST:
+            (humid_raw, temp_raw) = (first, second)
         else:
-            return True
+            (temp_raw, humid_raw) = (first, second)
+        # Calculate temperatures in °C and humidities in %RH
+        return (temp_raw * SHTC3_T_SCALE - 45.0, humid_raw * SHTC3_H_SCALE, valid)
 
 
     ###
@@ -158,7 +305,7 @@ class SHTC3(object):
     ###
     def reset(self):
         # Write soft-reset command
-        self.__bus.write_byte_data(self.__i2c_address,(SHTC3_COM_SOFT_RESET>>8),(SHTC3_COM_SOFT_RESET&0xFF))
+        self.__write_command(SHTC3_COM_SOFT_RESET)
         # Return True
         return True
 
@@ -171,7 +318,7 @@ class SHTC3(object):
     ###
     def read_id(self):
         # Write ID read command
-        self.__bus.write_byte_data(self.__i2c_address,(SHTC3_COM_READID>>8),(SHTC3_COM_READID&0xFF))
+        self.__write_command(SHTC3_COM_READID)
         # Read two bytes and perform CRC check
         value = self.read16_crc()
         if value is False:
@@ -187,8 +334,9 @@ class SHTC3(object):
     # @return   True in case of success; False otherwise
     ###
     def sleep_enable(self):
-        # Write soft-reset command
-        self.__bus.write_byte_data(self.__i2c_address,(SHTC3_COM_SLEEP>>8),(SHTC3_COM_SLEEP&0xFF))
+        # Write sleep command
+        self.__write_command(SHTC3_COM_SLEEP)
+        self.__awake = False
         # Return True
         return True
 
@@ -200,10 +348,14 @@ class SHTC3(object):
     # @return   True in case of success; False otherwise
     ###
     def sleep_disable(self):
-        # Write soft-reset command
-        self.__bus.write_byte_data(self.__i2c_address,(SHTC3_COM_WAKEUP>>8),(SHTC3_COM_WAKEUP&0xFF))
+        # Nothing to do if the sensor is already awake
+        if self.__awake:
+            return True
+        # Write wake-up command
+        self.__write_command(SHTC3_COM_WAKEUP)
         # Let the sensor wake up
         time.sleep(SHTC3_WAKEUP_DELAY/1000)
+        self.__awake = True
         # Return True
         return True
 
@@ -218,7 +370,7 @@ class SHTC3(object):
     ###
     def raw2temperature(self, raw):
       # Calculate resulting temperature [°C]
-      return (175.0 * (float(raw) / 65536.0) - 45.0)
+      return (raw * SHTC3_T_SCALE - 45.0)
 
 
     ###
@@ -231,7 +383,7 @@ class SHTC3(object):
     ###
     def raw2humidity(self, raw):
       # Calculate resulting relative humidity [%RH]
-      return (100.0 * (float(raw) / 65536.0))
+      return (raw * SHTC3_H_SCALE)
 
 
     ###
@@ -239,36 +391,57 @@ class SHTC3(object):
     #
     # @param    dev             Pointer to the device structure
     # @param    lp_en           Enable low-power mode (1..enabled/0..disabled)
+    # @param    cst_en          Use clock stretching instead of polling (1..enabled/0..disabled)
     # @return   Values read in case of success; False otherwise
+    #
+    # @note     A measurement younger than max_age is returned without accessing the sensor.
+    # @note     With clock stretching, the sensor holds SCL until the result is ready (up to 12.1ms);
+    #           the I2C controller's clock-stretch timeout has to be long enough for that.
     ###
-    def read_temperature_humidity(self, lp_en):
-        # Measurement command depends on mode setting
-        cmd_meas = lp_en if SHTC3_COM_MEAS_LPOW else SHTC3_COM_MEAS_NORM
+    def read_temperature_humidity(self, lp_en=0, cst_en=0):
+        # Check if the last measurement is still recent enough
+        now = time.monotonic()
+        if (self.__last is not None) and ((now - self.__last_ts) < self.__max_age):
+            return self.__last
+        # Make sure the sensor is awake (no bus access if it already is)
+        self.sleep_disable()
+        # Measurement command depends on mode settings
+        if cst_en:
+            cmd_meas = SHTC3_COM_MEAS_LPOW_CST if lp_en else SHTC3_COM_MEAS_NORM_CST
+        else:
+            cmd_meas = SHTC3_COM_MEAS_LPOW if lp_en else SHTC3_COM_MEAS_NORM
         # Write read command
-        self.__bus.write_byte_data(self.__i2c_address,(cmd_meas>>8),(cmd_meas&0xFF))
-        # Wait for the measurement to be ready
-        time.sleep(SHTC3_POLLING_DELAY/1000)
-        # Read the measurements
-        temp_raw = 0
-        humid_raw = 0
+        self.__write_command(cmd_meas)
+        if not cst_en:
+            # Wait for the typical measurement duration (polled afterwards)
+            time.sleep((SHTC3_MEAS_TIME_LPOW if lp_en else SHTC3_MEAS_TIME_NORM)/1000)
+        # Read both measurements (2x two data bytes and one checksum byte) at once
+        data = self.__read_raw(6)
+        # The sensor does not acknowledge reads while measuring; poll until the timeout
+        deadline = now + (SHTC3_POLLING_DELAY/1000)
+        while (data is False) and (time.monotonic() < deadline):
+            time.sleep(SHTC3_POLLING_INTERVAL/1000)
+            data = self.__read_raw(6)
+        if data is False:
+            return False
         if SHTC3_RH_FIRST:
-            # Read two humidty bytes and perform CRC check
-            humid_raw = self.read16_crc()
-            # Read two temperature bytes and perform CRC check
-            temp_raw = self.read16_crc()
+            # Humidity first, then temperature (perform CRC checks)
+            humid_raw = self.__word_crc(data, 0)
+            temp_raw = self.__word_crc(data, 3)
         else:
-            # Read two temperature bytes and perform CRC check
-            temp_raw = self.read16_crc()
-            # Read two humidty bytes and perform CRC check
-            humid_raw = self.read16_crc()
+            # Temperature first, then humidity (perform CRC checks)
+            temp_raw = self.__word_crc(data, 0)
+            humid_raw = self.__word_crc(data, 3)
         # Check if CRC was successful
         if (temp_raw is False) or (humid_raw is False):
             return False
         # Calculate temperature in °C and humidity in %RH
         temperature = self.raw2temperature(temp_raw)
         humidity = self.raw2humidity(humid_raw)
-        # Return values
-        return (temperature, humidity)
+        # Store and return values
+        self.__last = (temperature, humidity)
+        self.__last_ts = now
+        return self.__last
 
 
     ###
@@ -278,11 +451,13 @@ class SHTC3(object):
     # @param    lp_en           Enable low-power mode (1..enabled/0..disabled)
     # @return   Value read in case of success; False otherwise
     ###
-    def read_temperature(self, lp_en):
-        # Call reading function
-        (temperature, humidity) = self.get_temperature_humidity(lp_en)
+    def read_temperature(self, lp_en=0):
+        # Call reading function (measurement is shared within max_age)
+        values = self.read_temperature_humidity(lp_en)
+        if values is False:
+            return False
         # Return the temperature
-        return temperature
+        return values[0]
 
 
     ###
@@ -292,8 +467,10 @@ class SHTC3(object):
     # @param    lp_en           Enable low-power mode (1..enabled/0..disabled)
     # @return   Value read in case of success; False otherwise
     ###
-    def read_humidity(self, lp_en):
-        # Call reading function
-        (temperature, humidity) = self.get_temperature_humidity(lp_en)
+    def read_humidity(self, lp_en=0):
+        # Call reading function (measurement is shared within max_age)
+        values = self.read_temperature_humidity(lp_en)
+        if values is False:
+            return False
         # Return the humidity
-        return humidity
+        return values[1]
@@ -12,13 +12,22 @@
 #
 # @example  fcnt = FCNT()                 # Get an instance with default I2C address (0x24)
 # @example  ready = fcnt.is_ready()       # Check if measurement is ready
+# @example  ready = fcnt.wait_for_ready() # Wait until the next measurement is ready
 # @example  fmeas = fcnt.get_frequency()  # Get the latest frequency measurement
+# @example  fcnt.start_streaming(10, cb)  # Read 10 times per second in the background (cb(t, f) per sample)
+# @example  (t, fmeas) = fcnt.latest()    # Get the latest streamed sample (no bus access)
+# @example  fcnt.stop_streaming()         # Stop the background reading
 #####
 
 
 ##### LIBRARIES #####
-# smbus (provides subset of I2C functionality)
-import smbus
+# time (for sleep method)
+import time
+# threading and queue (for streaming)
+import threading
+import queue
+# Import required (local) modules
+from ETB.util.I2C_helper import I2C_get_bus
 
 
 ##### GLOBAL VARIABLES #####
@@ -27,6 +36,16 @@ FCNT_REG_CFG            = 0x00
 FCNT_REG_LSB            = 0x01
 FCNT_REG_MSB            = 0x02
 FCNT_REG_XMSB           = 0x03
+# Number of registers (CFG, LSB, MSB, XMSB)
+FCNT_REG_LEN            = 4
+### Timing ###
+# Interval between two polls of the ready flag [s]
+FCNT_POLL_INTERVAL      = 0.001
+# Part of the measured period to sleep before polling the ready flag
+FCNT_POLL_LEAD          = 0.9
+### Streaming ###
+# Number of samples queued for the callback (newer samples are dropped if full)
+FCNT_STREAM_QUEUE_LEN   = 64
 ### Settings ###
 # Reset (RST)
 FCNT_CFG_RST_OFFSET     = 7
@@ -60,6 +79,17 @@ FCNT_CFG_SEL = {
     2:  0x02,
     3:  0x03
 }
+# Field values shifted to their position in the CFG register (for the setters)
+FCNT_CFG_SMP_SHIFTED = {k: (v<<FCNT_CFG_SMP_OFFSET) for k,v in FCNT_CFG_SMP.items()}
+FCNT_CFG_RES_SHIFTED = {k: (v<<FCNT_CFG_RES_OFFSET) for k,v in FCNT_CFG_RES.items()}
+FCNT_CFG_SEL_SHIFTED = {k: (v<<FCNT_CFG_SEL_OFFSET) for k,v in FCNT_CFG_SEL.items()}
+# Valid result bits by resolution (XMSB/MSB/LSB for Hz, MSB/LSB for kHz, LSB otherwise)
+FCNT_RES_RESULT_MASK = {
+    0x00:   0x0000FF,
+    0x01:   0xFFFFFF,
+    0x02:   0x00FFFF,
+    0x03:   0x0000FF
+}
 
 
 #####
@@ -79,8 +109,29 @@ class FCNT(object):
         # Object's own I2C address
         self.__i2c_address = address
         # @var __bus
-        # Object's own I2C bus number
-        self.__bus = smbus.SMBus(busnum)
+        # Object's I2C bus (shared) and its lock
+        self.__bus, self.__lock = I2C_get_bus(busnum)
+        # @var __cfg
+        # Cached CFG register value without the volatile RDY and RST bits (None if not read yet)
+        self.__cfg = None
+        # @var __t_ready
+        # Time (monotonic) of the last ready edge (None if unknown)
+        self.__t_ready = None
+        # @var __t_ready_exact
+        # The last ready edge was observed while polling (not only found already set)
+        self.__t_ready_exact = False
+        # @var __period
+        # Measured time between two measurements [s] (None if unknown)
+        self.__period = None
+        # @var __latest
+        # Latest streamed sample as (time (monotonic), frequency) (None if none yet)
+        self.__latest = None
+        # @var __stream_threads
+        # Streaming threads (None if not streaming)
+        self.__stream_threads = None
+        # @var __stream_stop
+        # Event to stop the streaming threads
+        self.__stream_stop = threading.Event()
     
     
     ###
@@ -90,8 +141,12 @@ class FCNT(object):
     # @param[in]    register        The I2C register address.
     # @return       Unsigned byte value in case of success; otherwise False.
     def _i2c_read_U8(self, register):
-        # Read value from the specified register
-        return (self.__bus.read_byte_data(self.__i2c_address, register) & 0xFF)
+        # Try to read value from the specified register (0x00 is a valid value)
+        try:
+            with self.__lock:
+                return (self.__bus.read_byte_data(self.__i2c_address, register) & 0xFF)
+        except OSError:
+            return False
 
 
     ###
@@ -102,10 +157,46 @@ class FCNT(object):
     # @param[in]    value           The byte value to be written.
     # @return       True in case of success; otherwise False.
     def _i2c_write_8(self, register, value):
-        # Write the given value to the specified register
-        self.__bus.write_byte_data(self.__i2c_address, register, (value&0xFF))
+        # Try to write the given value to the specified register
+        try:
+            with self.__lock:
+                self.__bus.write_byte_data(self.__i2c_address, register, (value&0xFF))
+        except OSError:
+            return False
+        return True
+
+
+    ###
+    # Read a block of bytes starting at the specified I2C register (single transaction).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    register        The I2C register address of the first byte.
+    # @param[in]    length          Number of bytes to read.
+    # @return       List of byte values in case of success; otherwise False.
+    def _i2c_read_block(self, register, length):
+        # Try to read the registers (register write, repeated start, and read)
+        try:
+            with self.__lock:
+                return self.__bus.read_i2c_block_data(self.__i2c_address, register, length)
+        except OSError:
+            return False
 
 
+    ###
+    # Get the CFG register value (cached after the first read or write).
+    # The cached value does not contain the RDY and RST bits as they are set by the device.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    cached          Return the cached value if available (default: True).
+    # @return       CFG register value in case of success; otherwise False.
+    def _load_cfg(self, cached=True):
+        if (self.__cfg is None) or (not cached):
+            ret = self._i2c_read_U8(FCNT_REG_CFG)
+            if ret is False:
+                return False
+            self.__cfg = ret & FCNT_CFG_RDY_MASK & FCNT_CFG_RST_MASK
+        return self.__cfg
+
 
     ###
     # Read the configuration register value flags.
@@ -117,11 +208,13 @@ class FCNT(object):
         ret = self._i2c_read_U8(FCNT_REG_CFG)
         if ret is False:
             return False
+        # Update the cached value
+        self.__cfg = ret & FCNT_CFG_RDY_MASK & FCNT_CFG_RST_MASK
         # Extract the flags
-        RDY = (ret & FCNT_CFG_RDY_MASK) >> FCNT_CFG_RDY_OFFSET
-        SMP = (ret & FCNT_CFG_SMP_MASK) >> FCNT_CFG_SMP_OFFSET
-        RES = (ret & FCNT_CFG_RES_MASK) >> FCNT_CFG_RES_OFFSET
-        SEL = (ret & FCNT_CFG_SEL_MASK) >> FCNT_CFG_SEL_OFFSET
+        RDY = (ret & ~FCNT_CFG_RDY_MASK) >> FCNT_CFG_RDY_OFFSET
+        SMP = (ret & ~FCNT_CFG_SMP_MASK) >> FCNT_CFG_SMP_OFFSET
+        RES = (ret & ~FCNT_CFG_RES_MASK) >> FCNT_CFG_RES_OFFSET
+        SEL = (ret & ~FCNT_CFG_SEL_MASK) >> FCNT_CFG_SEL_OFFSET
         # Return the flag values
         return (RDY,SMP,RES,SEL)
 
@@ -131,71 +224,142 @@ class FCNT(object):
     #
     # @param[in]    self            The object pointer.
     # @return       Ready flag in case of success; otherwise False.
+    #
+    # @note     The ready flag is set by the device and therefore always read (never cached).
     def get_ready_flag(self):
-        # Read the configuration registers
-        reg = self.read_config()
+        # Read the configuration register
+        ret = self._i2c_read_U8(FCNT_REG_CFG)
         if ret is False:
             return False
         else:
             # Return the ready flag
-            return reg[0]
+            return (ret & ~FCNT_CFG_RDY_MASK) >> FCNT_CFG_RDY_OFFSET
 
 
     ###
-    # Read the sampling configuration.
+    # Get the sampling configuration.
     #
     # @param[in]    self            The object pointer.
     # @return       Sampling configuration in case of success; otherwise False.
     def get_sampling(self):
-        # Read the configuration registers
-        reg = self.read_config()
+        # Get the configuration register
+        ret = self._load_cfg()
         if ret is False:
             return False
         else:
             # Return the sampling configuration
-            return reg[1]
+            return (ret & ~FCNT_CFG_SMP_MASK) >> FCNT_CFG_SMP_OFFSET
 
     ###
-    # Read the resolution configuration.
+    # Get the resolution configuration.
     #
     # @param[in]    self            The object pointer.
     # @return       Resolution configuration in case of success; otherwise False.
     def get_resolution(self):
-        # Read the configuration registers
-        reg = self.read_config()
+        # Get the configuration register
+        ret = self._load_cfg()
         if ret is False:
             return False
         else:
             # Return the resolution configuration
-            return reg[2]
+            return (ret & ~FCNT_CFG_RES_MASK) >> FCNT_CFG_RES_OFFSET
 
 
     ###
-    # Read the channel selection.
+    # Get the channel selection.
     #
     # @param[in]    self            The object pointer.
     # @return       Channel selection in case of success; otherwise False.
     def get_channel(self):
-        # Read the configuration registers
-        reg = self.read_config()
+        # Get the configuration register
+        ret = self._load_cfg()
         if ret is False:
             return False
         else:
             # Return the channel selection
-            return reg[3]
+            return (ret & ~FCNT_CFG_SEL_MASK) >> FCNT_CFG_SEL_OFFSET
 
 
     ###
     # Check if the ready flag is set.
     #
     # @param[in]    self            The object pointer.
-    # @return       True in case of success; otherwise False.
+    # @return       True if a measurement is ready; otherwise False.
     def is_ready(self):
-        ret = self.get_ready_flag()
+        # Read the configuration register and test the ready bit only
+        ret = self._i2c_read_U8(FCNT_REG_CFG)
         if ret is False:
             return False
-        else:
+        return bool(ret & (1<<FCNT_CFG_RDY_OFFSET))
+
+
+    ###
+    # Wait until a new measurement is ready.
+    # Once the time between two measurements is known, the ready flag is only polled
+    # shortly before the next measurement is expected (fewer I2C transactions).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    timeout         Timeout in milliseconds (default: 2000).
+    # @return       True if a measurement is ready; False in case of timeout or error.
+    def wait_for_ready(self, timeout=2000):
+        now = time.monotonic()
+        deadline = now + (timeout / 1000.0)
+        # Sleep until shortly before the next measurement is expected
+        if (self.__period is not None) and (self.__t_ready is not None):
+            t_next = self.__t_ready + (self.__period * FCNT_POLL_LEAD)
+            if (t_next > now) and (t_next < deadline):
+                time.sleep(t_next - now)
+        # Check if a measurement is already ready (time of completion unknown)
+        ret = self._i2c_read_U8(FCNT_REG_CFG)
+        if ret is False:
+            return False
+        if ret & (1<<FCNT_CFG_RDY_OFFSET):
+            self._ready_seen(time.monotonic(), False)
             return True
+        # Poll until the measurement is ready
+        while True:
+            # check if timeout has already been reached
+            if time.monotonic() >= deadline:
+                # Timeout
+                return False
+            time.sleep(FCNT_POLL_INTERVAL)
+            ret = self._i2c_read_U8(FCNT_REG_CFG)
+            if ret is False:
+                return False
+            if ret & (1<<FCNT_CFG_RDY_OFFSET):
+                break
+        # Update the measurement timing
+        self._ready_seen(time.monotonic(), True)
+        return True
+
+
+    ###
+    # Update the measurement timing for a ready flag seen being set.
+    # A polled edge is exact (within the poll interval) and refines the period; a flag that
+    # is already set only tells that the edge happened before, so it is placed on the known
+    # period grid (or taken as an upper bound while the period is still unknown).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    now             Time (monotonic) the flag was read.
+    # @param[in]    polled          The flag was not set on the previous read (edge observed).
+    def _ready_seen(self, now, polled):
+        t_prev = self.__t_ready
+        period = self.__period
+        if polled:
+            # Learn the period from two exact edges (measurements may have been skipped)
+            if (t_prev is not None) and self.__t_ready_exact:
+                elapsed = now - t_prev
+                n = max(1, round(elapsed / period)) if period else 1
+                self.__period = elapsed / n
+            self.__t_ready = now
+            self.__t_ready_exact = True
+        elif (t_prev is not None) and period:
+            # Latest edge on the period grid (unchanged if still the same measurement)
+            self.__t_ready = t_prev + (int((now - t_prev) / period) * period)
+        else:
+            # Edge happened at or before now (not usable for the period)
+            self.__t_ready = now
+            self.__t_ready_exact = False
 
 
     ###
@@ -230,28 +394,24 @@ class FCNT(object):
     #
     # @param[in]    self            The object pointer.
     # @return       Latest frequency reading in case of success; otherwise False.
+    #
+    # @note     Relies on the FCNT firmware auto-incrementing its register pointer on
+    #           multi-byte reads (CFG, LSB, MSB, and XMSB are returned by one read).
     def get_frequency(self):
+        # Read the CFG and the result registers at once
+        data = self._i2c_read_block(FCNT_REG_CFG, FCNT_REG_LEN)
+        if data is False:
+            return False
+        cfg = data[FCNT_REG_CFG]
+        # Update the cached value
+        self.__cfg = cfg & FCNT_CFG_RDY_MASK & FCNT_CFG_RST_MASK
         # Check if measurement is ready
-        if self.is_ready() is False:
+        if not (cfg & ~FCNT_CFG_RDY_MASK):
             return False
         # Get the current resolution
-        res = self.get_resolution()
-        if res is False:
-            return False
-        # Number of bytes to read depend on resolution
-        lsb  = 0
-        msb  = 0
-        xmsb = 0
-        # For Hz resolution read XMSB
-        if (res == FCNT_CFG_RES['Hz']):
-            xmsb = self.read_XMSB()
-        # For Hz or kHz resolution read MSB
-        if (res == FCNT_CFG_RES['Hz']) or (res == FCNT_CFG_RES['kHz']):
-            msb = self.read_MSB()
-        # In any case read LSB
-        lsb = self.read_LSB()
-        # Aggregate and return result
-        return ((xmsb<<16) | (msb<<8) | lsb)
+        res = (cfg & ~FCNT_CFG_RES_MASK) >> FCNT_CFG_RES_OFFSET
+        # Aggregate the result (number of bytes used depend on resolution)
+        return (int.from_bytes(bytes(data[FCNT_REG_LSB:]), 'little') & FCNT_RES_RESULT_MASK[res])
 
 
     ###
@@ -264,15 +424,22 @@ class FCNT(object):
         # Check the channel parameter
         if ch not in FCNT_CFG_SEL:
             raise ValueError('Valid channels are: 0, 1, 2, and 3')
-        # Get current CFG register value
-        ret = self._i2c_read_U8(FCNT_REG_CFG)
+        # Get current CFG register value (cached)
+        ret = self._load_cfg()
         # Check return status
         if ret is False:
             return False
         # Get the new CFG register value
-        value = (ret & FCNT_CFG_SEL_MASK) | (FCNT_CFG_SEL[ch]<<FCNT_CFG_SEL_OFFSET)
+        value = (ret & FCNT_CFG_SEL_MASK) | FCNT_CFG_SEL_SHIFTED[ch]
         # Write new value to CFG register
-        return self._i2c_write_8(FCNT_REG_CFG,value)
+        if self._i2c_write_8(FCNT_REG_CFG,value) is False:
+            return False
+        # Update the cached value
+        self.__cfg = value
+        # The measurement timing may have changed
+        self.__t_ready = None
+        self.__period = None
+        return True
     
 
     ###
@@ -285,15 +452,22 @@ class FCNT(object):
         # Check the resolution parameter
         if res not in FCNT_CFG_RES:
             raise ValueError('Valid resolution are: \'Hz\', \'kHz\', and \'MHz\'')
-        # Read current CFG register value
-        ret = self._i2c_read_U8(FCNT_REG_CFG)
+        # Get current CFG register value (cached)
+        ret = self._load_cfg()
         # Check return status
         if ret is False:
             return False
         # Get the new CFG register value
-        value = (ret & FCNT_CFG_RES_MASK) | (FCNT_CFG_RES[res]<<FCNT_CFG_RES_OFFSET)
+        value = (ret & FCNT_CFG_RES_MASK) | FCNT_CFG_RES_SHIFTED[res]
         # Write new value to CFG register
-        return self._i2c_write_8(FCNT_REG_CFG,value)
+        if self._i2c_write_8(FCNT_REG_CFG,value) is False:
+            return False
+        # Update the cached value
+        self.__cfg = value
+        # The measurement timing may have changed
+        self.__t_ready = None
+        self.__period = None
+        return True
     
 
     ###
@@ -306,15 +480,22 @@ class FCNT(object):
         # Check the sampling parameter
         if smp not in FCNT_CFG_SMP:
             raise ValueError('Valid resolution are: 1, 3, 5, and 10')
-        # Read current CFG register value
-        ret = self._i2c_read_U8(FCNT_REG_CFG)
+        # Get current CFG register value (cached)
+        ret = self._load_cfg()
         # Check return status
         if ret is False:
             return False
         # Get the new CFG register value
-        value = (ret & FCNT_CFG_SMP_MASK) | (FCNT_CFG_SMP[smp]<<FCNT_CFG_SMP_OFFSET)
+        value = (ret & FCNT_CFG_SMP_MASK) | FCNT_CFG_SMP_SHIFTED[smp]
         # Write new value to CFG register
-        return self._i2c_write_8(FCNT_REG_CFG,value)
+        if self._i2c_write_8(FCNT_REG_CFG,value) is False:
+            return False
+        # Update the cached value
+        self.__cfg = value
+        # The measurement timing may have changed
+        self.__t_ready = None
+        self.__period = None
+        return True
 
 
     ###
@@ -323,12 +504,124 @@ class FCNT(object):
     # @param[in]    self            The object pointer.
     # @return       True in case of success; otherwise False.
     def reset(self):
-        # Read current CFG register value
-        ret = self._i2c_read_U8(FCNT_REG_CFG)
+        # Get current CFG register value (cached)
+        ret = self._load_cfg()
         # Check return status
         if ret is False:
             return False
         # Get the new CFG register value
         value = (ret & FCNT_CFG_RST_MASK) | (1<<FCNT_CFG_RST_OFFSET)
         # Write new value to CFG register
-        return self._i2c_write_8(FCNT_REG_CFG,value)
+        if self._i2c_write_8(FCNT_REG_CFG,value) is False:
+            return False
+        # The device may change its configuration on reset (read again on next use)
+        self.__cfg = None
+        self.__t_ready = None
+        self.__period = None
+        return True
+
+
+    ###
+    # Start reading the frequency periodically in a background thread.
+    # The reading thread does only the I2C transfers; the samples are passed to the
+    # callback by a second thread (slow callbacks do not delay the readings).
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    rate            Reading rate in Hz.
+    # @param[in]    callback        Function called as callback(t, frequency) per sample (default: None).
+    # @return       True in case of success; False if already streaming.
+    #
+    # @note     The bus is locked per transfer, so other methods can be used while streaming;
+    #           configuration changes take effect on the following readings.
+    # @note     Samples are dropped if the callback falls behind by more than FCNT_STREAM_QUEUE_LEN
+    #           samples; exceptions raised by the callback are ignored.
+    def start_streaming(self, rate, callback=None):
+        # Check the given rate
+        if rate <= 0:
+            raise ValueError('Streaming rate has to be positive')
+        # Check if already streaming
+        if self.__stream_threads is not None:
+            return False
+        self.__stream_stop.clear()
+        # Queue to the callback thread (if any)
+        samples = queue.Queue(FCNT_STREAM_QUEUE_LEN) if callback is not None else None
+        self.__stream_threads = [threading.Thread(target=self.__stream_read, args=(1.0/rate, samples), daemon=True)]
+        if callback is not None:
+            self.__stream_threads.append(threading.Thread(target=self.__stream_process, args=(samples, callback), daemon=True))
+        for thread in self.__stream_threads:
+            thread.start()
+        return True
+
+
+    ###
+    # Stop the background reading (the latest sample is kept).
+    #
+    # @param[in]    self            The object pointer.
+    def stop_streaming(self):
+        # Check if streaming at all
+        if self.__stream_threads is None:
+            return
+        # Stop the threads and wait for them to finish (queued samples are processed)
+        self.__stream_stop.set()
+        for thread in self.__stream_threads:
+            thread.join()
+        self.__stream_threads = None
+
+
+    ###
+    # Get the latest streamed sample.
+    #
+    # @param[in]    self            The object pointer.
+    # @return       Tuple of (time (monotonic), frequency) in case of success; otherwise False.
+    def latest(self):
+        if self.__latest is None:
+            return False
+        return self.__latest
+
+
+    ###
+    # Streaming thread reading the frequency.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    period          Reading period in seconds.
+    # @param[in]    samples         Queue to the callback thread (None if no callback).
+    def __stream_read(self, period, samples):
+        stop = self.__stream_stop
+        monotonic = time.monotonic
+        t_next = monotonic()
+        while not stop.is_set():
+            freq = self.get_frequency()
+            if freq is not False:
+                sample = (monotonic(), freq)
+                self.__latest = sample
+                if samples is not None:
+                    try:
+                        samples.put_nowait(sample)
+                    except queue.Full:
+                        # Callback thread falls behind; drop the sample
+                        pass
+            # Schedule the next reading (skip missed instants)
+            now = monotonic()
+            t_next = max(t_next + period, now)
+            stop.wait(t_next - now)
+        # Signal the end to the callback thread
+        if samples is not None:
+            samples.put(None)
+
+
+    ###
+    # Streaming thread passing the samples to the callback.
+    #
+    # @param[in]    self            The object pointer.
+    # @param[in]    samples         Queue from the reading thread.
+    # @param[in]    callback        Function called as callback(t, frequency) per sample.
+    def __stream_process(self, samples, callback):
+        while True:
+            sample = samples.get()
+            if sample is None:
+                break
+            try:
+                callback(*sample)
+            except Exception:
+                # Do not let a faulty callback stop the processing (and block stop_streaming)
+                pass
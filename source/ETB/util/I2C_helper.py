@@ -22,6 +22,24 @@
 ##### LIBRARIES #####
 # smbus (provides subset of I2C functionality)
 import smbus
+# os (for raw access to the I2C device file)
+import os
+# fcntl (for the I2C device file ioctl)
+import fcntl
+# threading (for the bus locks)
+import threading
+# asyncio (for the coroutine wrappers)
+import asyncio
+# warnings (for the bus clock check)
+import warnings
+
+
+##### GLOBAL VARIABLES #####
+# ioctl request to set the slave address (see linux/i2c-dev.h)
+I2C_SLAVE = 0x0703
+# Shared bus objects and their locks (by bus number; see I2C_get_bus)
+I2C_BUSES = {}
+I2C_BUSES_LOCK = threading.Lock()
 
 
 ###
@@ -32,25 +50,27 @@ import smbus
 # @param[in]    busnum          Specific I2C bus number (default: 1)
 # return        List of available devices (addresses).
 def I2C_scan(start=0x00, end=0x78, busnum=1):
-    # Try to open the I2C bus
+    # Try to get the (shared) I2C bus
     try:
-        bus = smbus.SMBus(busnum)
+        (bus, lock) = I2C_get_bus(busnum)
     except:
         return None
     else:
         devices = []
         # Scan specified addresses for devices
         for i in range(start, end):
-            val = 1
             try:
-                # If read is successful, device is available at this address
-                bus.read_byte(i)
-            except OSError as e:
-                val = e.args[0]
-            else:
-                if val == 1:
-                    # Add device-address to the list
-                    devices.append(i)
+                # If the transaction is acknowledged, device is available at this address
+                # (read byte for EEPROM ranges like i2cdetect, otherwise quick write)
+                with lock:
+                    if (0x30 <= i <= 0x37) or (0x50 <= i <= 0x5F):
+                        bus.read_byte(i)
+                    else:
+                        bus.write_quick(i)
+            except OSError:
+                continue
+            # Add device-address to the list
+            devices.append(i)
         # Return the list of found devices
         return devices
 
@@ -62,16 +82,102 @@ def I2C_scan(start=0x00, end=0x78, busnum=1):
 # @param[in]    busnum          Specific I2C bus number (default: 1)
 # @return       True in case of success; otherwise False.
 def I2C_is_available(address, busnum=1):
-    # Try to open the I2C bus
+    # Try to get the (shared) I2C bus
     try:
-        bus = smbus.SMBus(busnum)
+        (bus, lock) = I2C_get_bus(busnum)
     except:
         return False
     else:
         try:
             # Try to communicate with the device
-            bus.read_byte(address)
+            with lock:
+                bus.read_byte(address)
         except:
             return False
         else:
             return True
+
+
+###
+# Get the configured clock frequency of an I2C bus (from the device tree).
+#
+# @param[in]    busnum          Specific I2C bus number (default: 1)
+# @return       Bus clock frequency in Hz in case of success; otherwise None.
+#
+# @note     The clock is set at boot, e.g. with "dtparam=i2c_arm_baudrate=400000" in /boot/config.txt
+def I2C_get_clock(busnum=1):
+    # Try to read the clock-frequency property (32-bit big-endian)
+    try:
+        with open("/sys/class/i2c-adapter/i2c-%d/of_node/clock-frequency" % busnum, "rb") as f:
+            raw = f.read(4)
+    except OSError:
+        return None
+    # Check the length of the property
+    if len(raw) != 4:
+        return None
+    return int.from_bytes(raw, "big")
+
+
+###
+# Check if an I2C bus runs at least at the given clock frequency (warn if not).
+#
+# @param[in]    clock           Minimum bus clock frequency in Hz.
+# @param[in]    busnum          Specific I2C bus number (default: 1)
+# @return       False if the bus is known to run slower; otherwise True.
+def I2C_check_clock(clock, busnum=1):
+    # Get the configured bus clock
+    actual = I2C_get_clock(busnum)
+    if (actual is not None) and (actual < clock):
+        warnings.warn('I2C bus runs at %d Hz; set "dtparam=i2c_arm_baudrate=%d" in /boot/config.txt' % (actual, clock))
+        return False
+    return True
+
+
+###
+# Open the I2C device file for plain (non-SMBus) transfers with the given slave address.
+# Reads and writes on the returned file descriptor (os.read/os.write) are single I2C
+# transactions without a register/command byte, e.g., for sensors using 16-bit commands.
+#
+# @param[in]    address         Slave address of the device.
+# @param[in]    busnum          Specific I2C bus number (default: 1)
+# @return       File descriptor in case of success; otherwise None.
+def I2C_open_raw(address, busnum=1):
+    # Try to open the I2C device file
+    try:
+        fd = os.open("/dev/i2c-%d" % busnum, os.O_RDWR)
+    except OSError:
+        return None
+    # Try to set the slave address
+    try:
+        fcntl.ioctl(fd, I2C_SLAVE, address)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+###
+# Get the shared bus object of an I2C bus (opened once per process) and its lock.
+# Drivers sharing a bus should hold the lock during each transaction.
+#
+# @param[in]    busnum          Specific I2C bus number (default: 1)
+# @return       Tuple of (SMBus object, RLock).
+def I2C_get_bus(busnum=1):
+    with I2C_BUSES_LOCK:
+        entry = I2C_BUSES.get(busnum)
+        if entry is None:
+            entry = (smbus.SMBus(busnum), threading.RLock())
+            I2C_BUSES[busnum] = entry
+        return entry
+
+
+###
+# Run a blocking (I2C) function in the default executor of the running event loop.
+# Used by the drivers' coroutine (*_async) methods to not block the event loop;
+# concurrent transactions are serialized by the bus locks (see I2C_get_bus).
+#
+# @param[in]    func            Blocking function.
+# @param[in]    args            Arguments of the function.
+# @return       Return value of the function.
+async def I2C_run_async(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
@@ -11,6 +11,9 @@
 # @see      https://docs.python.org/3/library/subprocess.html#module-subprocess
 #
 # @example  MCU_flash("path_to/binary.hex")             # Flash the given binary on the MCU
+# @example  MCU_program("path_to/binary.hex", {'low': 0xFF})  # Flash binary and fuses at once
+# @example  (ef, hf, lf) = MCU_get_all_fuses()          # Read all fuse bytes at once
+# @example  MCU_set_fuses({'high': 0xD9, 'low': 0xFF})  # Program several fuse bytes at once
 # @example  MCU_erase()                                 # Erase the MCU
 # @example  MCU_reset()                                 # Reset the MCU (via RST GPIO pin)
 # @example  MCU_set_clksrc(MCU_CLK_EXT, False, False)   # Select the clock source
@@ -24,16 +27,26 @@ import subprocess
 import os
 # time (for sleep method)
 import time
-# GPIO functionality
-import RPi.GPIO as GPIO
-GPIO.setmode(GPIO.BCM)
+# GPIO functionality (lgpio if available, otherwise RPi.GPIO)
+try:
+    import lgpio
+except ImportError:
+    lgpio = None
+    import RPi.GPIO as GPIO
+    GPIO.setmode(GPIO.BCM)
 
 
 ##### GLOBAL VARIABLES #####
 # MCU target specifics
 MCU_TOOL        = 'avrdude'
+MCU_PROGRAMMER  = 'avrispv2'
 MCU_DEFAULT     = 'atmega1284p'
 PORT_DEFAULT    = '/dev/ttyACM0'
+# RST pulse width [s] (datasheet minimum is 2.5us; kept well above)
+MCU_RST_HOLD    = 0.01
+# GPIO chip of the RST pin and its handle (lgpio only; opened on first use)
+MCU_GPIO_CHIP   = 0
+MCU_GPIO_HANDLE = None
 # CLK selection
 MCU_CLK_INT     = 0
 MCU_CLK_EXT     = 1
@@ -62,6 +75,21 @@ MCU_FL_SUT_OFFSET       = 4
 MCU_FL_SUT_MASK         = 0xCF
 MCU_FL_CKSEL_OFFSET     = 0
 MCU_FL_CKSEL_MASK       = 0xF0
+# Last known fuse byte values (by port, MCU model, and fuse byte; see MCU_clear_fuse_cache)
+MCU_FUSE_CACHE = {}
+
+
+###
+# Run AVRDUDE with the given operations (without a shell).
+#
+# @param[in]    port            Serial port to be used.
+# @param[in]    mcu             MCU model for AVRDUDE.
+# @param[in]    ops             AVRDUDE operation arguments (e.g., "-U", "flash:w:binary.hex").
+# @return       Completed process (with captured output).
+def _MCU_run(port, mcu, *ops):
+    cmd = [MCU_TOOL, "-p", mcu, "-c", MCU_PROGRAMMER, "-P", port]
+    cmd.extend(ops)
+    return subprocess.run(cmd, capture_output=True)
 
 
 ###
@@ -78,10 +106,8 @@ def MCU_flash(binary, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
     # Check if the serial interface exists
     if not os.path.exists(port):
         return False
-    # Prepare program string
-    cmd = "%s -p %s -c avrispv2 -P %s -v -U flash:w:%s" % (MCU_TOOL, mcu, port, binary)
     # Try to flash the binary
-    ret = subprocess.run(cmd, shell=True, capture_output=True)
+    ret = _MCU_run(port, mcu, "-U", "flash:w:%s" % binary)
     # Check if flashing was successful
     if ret.returncode==0:
         return True
@@ -89,6 +115,63 @@ def MCU_flash(binary, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
         return False
 
 
+###
+# Flash a given binary and program the given fuses of the MCU (single AVRDUDE call).
+# Fuse bytes already known to have the given value are not programmed again.
+#
+# @param[in]    binary          Path to the binary (.hex; None to program the fuses only).
+# @param[in]    fuses           Fuse byte values by fuse byte ('extended', 'high', 'low'; default: None).
+# @param[in]    port            Serial port to be used.
+# @param[in]    mcu             MCU model for AVRDUDE.
+# @return       True in case of success; otherwise False.
+def MCU_program(binary, fuses=None, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
+    # Check if the given binary exists
+    if (binary is not None) and (not os.path.isfile(binary)):
+        return False
+    # Check if the serial interface exists
+    if not os.path.exists(port):
+        return False
+    if fuses is None:
+        fuses = {}
+    # Check if valid fuse bytes were chosen
+    for fuse in fuses:
+        if fuse not in MCU_FUSE_TAG:
+            raise ValueError('Valid fuse bytes are: \'extended\', \'high\', and \'low\'')
+    # Skip fuse bytes that are already programmed
+    fuses = {fuse: byte for (fuse, byte) in fuses.items() if MCU_FUSE_CACHE.get((port, mcu, fuse)) != byte}
+    # Prepare the operations (flash first, then the fuses)
+    ops = []
+    if binary is not None:
+        ops += ["-U", "flash:w:%s" % binary]
+    for fuse in fuses:
+        ops += ["-U", "%s:w:0x%02X:m" % (MCU_FUSE_TAG[fuse], fuses[fuse])]
+    # Check if there is anything to do
+    if not ops:
+        return True
+    # Try to flash the binary and program the fuses
+    ret = _MCU_run(port, mcu, *ops)
+    # Check if programming was successful
+    if ret.returncode==0:
+        for fuse in fuses:
+            MCU_FUSE_CACHE[(port, mcu, fuse)] = fuses[fuse]
+        return True
+    else:
+        # State of the fuses is unknown now
+        MCU_clear_fuse_cache()
+        return False
+
+
+###
+# Program several fuses of the MCU (single AVRDUDE call).
+#
+# @param[in]    fuses           Fuse byte values by fuse byte ('extended', 'high', 'low').
+# @param[in]    port            Serial port to be used.
+# @param[in]    mcu             MCU model for AVRDUDE.
+# @return       True in case of success; otherwise False.
+def MCU_set_fuses(fuses, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
+    return MCU_program(None, fuses, port, mcu)
+
+
 ###
 # Read the specified fuses of the MCU.
 #
@@ -103,13 +186,13 @@ def _MCU_get_fuse(fuse, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
     # Check if a valid fuse byte was chosen
     if fuse not in MCU_FUSE_TAG:
         raise ValueError('Valid fuse bytes are: \'extended\', \'high\', and \'low\'')
-    # Prepare program string
-    cmd = "%s -p %s -c avrispv2 -P %s -v -U %s:r:-:d" % (MCU_TOOL, mcu, port, MCU_FUSE_TAG[fuse])
-    # Try to program the fuses
-    ret = subprocess.run(cmd, shell=True, capture_output=True)
-    # Check if programming was successful
-    if ret.returncode==0:
-        return int(ret.stdout.decode("utf-8"))
+    # Try to read the fuses (raw byte to stdout)
+    ret = _MCU_run(port, mcu, "-U", "%s:r:-:r" % MCU_FUSE_TAG[fuse])
+    # Check if reading was successful
+    if (ret.returncode==0) and (len(ret.stdout)==1):
+        value = ret.stdout[0]
+        MCU_FUSE_CACHE[(port, mcu, fuse)] = value
+        return value
     else:
         return False
 
@@ -144,6 +227,33 @@ def MCU_get_lfuse(port=PORT_DEFAULT, mcu=MCU_DEFAULT):
     return _MCU_get_fuse('low', port, mcu)
 
 
+###
+# Read all fuses of the MCU (single AVRDUDE call).
+#
+# @param[in]    port            Serial port to be used.
+# @param[in]    mcu             MCU model for AVRDUDE.
+# @return       Tuple of the fuse byte values (extended, high, low) in case of success; otherwise False.
+def MCU_get_all_fuses(port=PORT_DEFAULT, mcu=MCU_DEFAULT):
+    # Check if the serial interface exists
+    if not os.path.exists(port):
+        return False
+    # Try to read the fuses
+    ret = _MCU_run(port, mcu,
+            "-U", "%s:r:-:r" % MCU_FUSE_TAG['extended'],
+            "-U", "%s:r:-:r" % MCU_FUSE_TAG['high'],
+            "-U", "%s:r:-:r" % MCU_FUSE_TAG['low'])
+    # Check if reading was successful
+    if ret.returncode!=0:
+        return False
+    # One raw byte per fuse (in the order of the operations)
+    if len(ret.stdout)!=3:
+        return False
+    values = tuple(ret.stdout)
+    for (fuse, value) in zip(('extended', 'high', 'low'), values):
+        MCU_FUSE_CACHE[(port, mcu, fuse)] = value
+    return values
+
+
 ###
 # Program the specified fuses of the MCU.
 #
@@ -159,14 +269,18 @@ def _MCU_set_fuse(fuse, byte, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
     # Check if a valid fuse byte was chosen
     if fuse not in MCU_FUSE_TAG:
         raise ValueError('Valid fuse bytes are: \'extended\', \'high\', and \'low\'')
-    # Prepare program string
-    cmd = "%s -p %s -c avrispv2 -P %s -v -U %s:w:0x%02X:m" % (MCU_TOOL, mcu, port, MCU_FUSE_TAG[fuse], byte)
+    # Check if the fuse byte is already programmed
+    if MCU_FUSE_CACHE.get((port, mcu, fuse)) == byte:
+        return True
     # Try to program the fuses
-    ret = subprocess.run(cmd, shell=True, capture_output=True)
+    ret = _MCU_run(port, mcu, "-U", "%s:w:0x%02X:m" % (MCU_FUSE_TAG[fuse], byte))
     # Check if programming was successful
     if ret.returncode==0:
+        MCU_FUSE_CACHE[(port, mcu, fuse)] = byte
         return True
     else:
+        # State of the fuse byte is unknown now
+        MCU_FUSE_CACHE.pop((port, mcu, fuse), None)
         return False
 
 
@@ -178,7 +292,7 @@ def _MCU_set_fuse(fuse, byte, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
 # @param[in]    mcu             MCU model for AVRDUDE.
 # @return       True in case of success; otherwise False.
 def MCU_set_efuse(byte, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
-    return _mcu_set_fuse('extended', byte, port, mcu)
+    return _MCU_set_fuse('extended', byte, port, mcu)
 
 
 ###
@@ -189,7 +303,7 @@ def MCU_set_efuse(byte, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
 # @param[in]    mcu             MCU model for AVRDUDE.
 # @return       True in case of success; otherwise False.
 def MCU_set_hfuse(byte, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
-    return _mcu_set_fuse('high', byte, port, mcu)
+    return _MCU_set_fuse('high', byte, port, mcu)
 
 
 ###
@@ -201,7 +315,7 @@ def MCU_set_hfuse(byte, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
 # @return       True in case of success; otherwise False.
 def MCU_set_lfuse(byte, port=PORT_DEFAULT, mcu=MCU_DEFAULT):
     # Try to program the fuses
-    return _mcu_set_fuse('low', byte, port, mcu)
+    return _MCU_set_fuse('low', byte, port, mcu)
 
 
 ###
@@ -254,10 +368,10 @@ def mcu_erase(port=PORT_DEFAULT, mcu=MCU_DEFAULT):
     # Check if the serial interface exists
     if not os.path.exists(port):
         return False
-    # Prepare erase string
-    cmd = "%s -p %s -c avrispv2 -P %s -v -e" % (MCU_TOOL, mcu, port)
+    # Read the fuses again after erasing
+    MCU_clear_fuse_cache()
     # Try to erase the MCU
-    ret = subprocess.run(cmd, shell=True, capture_output=True)
+    ret = _MCU_run(port, mcu, "-e")
     # Check if erasing was successful
     if ret.returncode==0:
         return True
@@ -265,17 +379,38 @@ def mcu_erase(port=PORT_DEFAULT, mcu=MCU_DEFAULT):
         return False
 
 
+###
+# Clear the cached fuse byte values (e.g., if the fuses were programmed by other means).
+def MCU_clear_fuse_cache():
+    MCU_FUSE_CACHE.clear()
+
+
 ###
 # Reset the MCU (via GPIO).
 #
 # @param[in]    rst_pin         GPIO pin for RST signal (BCM; default: 23).
 def mcu_reset(rst_pin=23):
+    global MCU_GPIO_HANDLE
+    # Use lgpio (if available)
+    if lgpio is not None:
+        if MCU_GPIO_HANDLE is None:
+            MCU_GPIO_HANDLE = lgpio.gpiochip_open(MCU_GPIO_CHIP)
+        # Set RST to output and pull the RST line down
+        lgpio.gpio_claim_output(MCU_GPIO_HANDLE, rst_pin, 0)
+        # Hold the RST line low
+        time.sleep(MCU_RST_HOLD)
+        # Set RST line back to "1"
+        lgpio.gpio_write(MCU_GPIO_HANDLE, rst_pin, 1)
+        # Release the RST line
+        lgpio.gpio_claim_input(MCU_GPIO_HANDLE, rst_pin)
+        lgpio.gpio_free(MCU_GPIO_HANDLE, rst_pin)
+        return
     # Set RST to output
     GPIO.setup(rst_pin, GPIO.OUT)
     # Pull the RST line down
     GPIO.output(rst_pin, 0)
-    # Wait for 500ms
-    time.sleep(0.5)
+    # Hold the RST line low
+    time.sleep(MCU_RST_HOLD)
     # Set RST line back to "1"
     GPIO.output(rst_pin, 1)
     # Release the RST line
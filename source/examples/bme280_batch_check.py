@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+#####
+# @brief   BME280 batch compensation check
+#
+# Check that the vectorized compensation of BME280.read_batch() gives
+# exactly the same values as the scalar compensation of BME280.read_all()
+# for a set of sample raw readings (no sensor access required).
+#
+# @file     /examlpes/bme280_batch_check.py
+# @author   $Author: Dominik Widhalm $
+# @version  $Revision: 1.0 $
+# @date     $Date: 2021/05/03 $
+#
+# @example  Run with 'python3 bme280_batch_check.py'
+#####
+
+##### PREREQUISITES ####################
+# Add path to the ETB module
+import sys
+# Check the Python version
+assert sys.version_info >= (3, 0), "ETB requires Python 3!"
+# Add base folder to path
+sys.path.insert(1, '../')
+# Import the BME280 module
+from ETB.sens.BME280 import *
+from ETB.sens.BME280 import _bme280_t_fine, _bme280_pressure, _bme280_humidity, _bme280_compensate_batch
+
+
+#### IMPORTS ###########################
+# random (for the sample readings)
+import random
+# numpy (for the batch compensation)
+import numpy as np
+
+
+##### DEFINES ##########################
+# Calibration values (datasheet example and typical humidity values)
+CAL_T                   = (27504, 26435, -1000)
+CAL_P                   = (36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+CAL_H                   = (75, 362, 0, 313, 50, 30)
+# Number of random sample readings (in addition to the fixed ones)
+SAMPLES                 = 10000
+
+
+########################################################################
+# Sample raw (temperature, pressure, humidity) readings
+raw = [(519888, 415148, 28000), (0, 0, 0), (0xFFFFF, 0xFFFFF, 0xFFFF), (0x80000, 0x80000, 0x8000)]
+random.seed(0)
+raw += [(random.randint(0, 0xFFFFF), random.randint(0, 0xFFFFF), random.randint(0, 0xFFFF)) for _ in range(SAMPLES)]
+
+# Compensate with the vectorized kernel (read_batch)
+t_fine, temperature, pressure, humidity = _bme280_compensate_batch(np.array(raw, dtype=np.int64), CAL_T, CAL_P, CAL_H)
+
+# Compare with the scalar kernels (read_all)
+errors = 0
+for i, (raw_t, raw_p, raw_h) in enumerate(raw):
+    t = _bme280_t_fine(raw_t, *CAL_T)
+    p = _bme280_pressure(raw_p, t, *CAL_P)
+    expected = (((t * 5 + 128) >> 8) / 100.0, np.nan if p is False else p, _bme280_humidity(raw_h, t, *CAL_H))
+    result = (temperature[i], pressure[i], humidity[i])
+    if (t != t_fine[i]) or not all((a == b) or (np.isnan(a) and np.isnan(b)) for a, b in zip(expected, result)):
+        errors += 1
+        print("Mismatch for raw %s: expected %s, got %s" % (raw[i], expected, result))
+
+# Print the result
+print("%d of %d samples differ" % (errors, len(raw)))
+sys.exit(1 if errors else 0)
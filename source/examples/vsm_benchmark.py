@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+#####
+# @brief   VSM micro-benchmark
+#
+# Micro-benchmark measuring the end-to-end duration of the VSM read
+# methods (mux select, INA read(s), mux deselect) and printing the
+# median and tail latencies of each method.
+#
+# @file     /examlpes/vsm_benchmark.py
+# @author   $Author: Dominik Widhalm $
+# @version  $Revision: 1.0 $
+# @date     $Date: 2021/05/03 $
+#
+# @example  Run with 'python3 vsm_benchmark.py'
+#####
+
+##### PREREQUISITES ####################
+# Add path to the ETB module
+import sys
+# Check the Python version
+assert sys.version_info >= (3, 0), "ETB requires Python 3!"
+# Add base folder to path
+sys.path.insert(1, '../')
+# Import the VSM module
+from ETB.core.VSM import *
+
+
+#### IMPORTS ###########################
+# time (for the high-resolution counter)
+import time
+
+
+##### DEFINES ##########################
+# Number of runs per method
+RUNS                    = 1000
+# Channel used for the single-channel methods
+CHANNEL                 = 1
+
+
+##### BENCHMARK ########################
+# Time a function and print its median and tail latencies
+def bench(name, func, runs=RUNS):
+    durations = [0]*runs
+    counter = time.perf_counter_ns
+    for i in range(runs):
+        start = counter()
+        func()
+        durations[i] = counter() - start
+    durations.sort()
+    p50 = durations[runs//2] / 1000
+    p90 = durations[(runs*9)//10] / 1000
+    p99 = durations[(runs*99)//100] / 1000
+    print("%-24s p50 = %8.1f us | p90 = %8.1f us | p99 = %8.1f us" % (name, p50, p90, p99))
+
+
+########################################################################
+# Initialize the VSM (read cache disabled, every call accesses the bus)
+vsm = VSM(cache_ttl=0)
+
+# Write starting-message
+print("===== VSM BENCHMARK START (%d runs) =====" % (RUNS))
+
+bench("ch_get_V(%d)" % (CHANNEL), lambda: vsm.ch_get_V(CHANNEL))
+bench("ch_get_mA(%d)" % (CHANNEL), lambda: vsm.ch_get_mA(CHANNEL))
+bench("ch_get_VA(%d)" % (CHANNEL), lambda: vsm.ch_get_VA(CHANNEL))
+bench("ch_is_power_good(%d)" % (CHANNEL), lambda: vsm.ch_is_power_good(CHANNEL))
+bench("ch_get_V_all()", vsm.ch_get_V_all)
+bench("ch_get_mA_all()", vsm.ch_get_mA_all)
+bench("snapshot()", vsm.snapshot)
+
+# Benchmark finished
+print("===== VSM BENCHMARK END   =====")
+########################################################################
+
+# End of experiment
+exit(0)